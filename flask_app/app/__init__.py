@@ -1,3 +1,4 @@
+import click
 from flask import Flask, render_template
 from .extensions import db, migrate, login_manager, csrf
 from .controllers.auth_controller import auth_bp
@@ -34,6 +35,7 @@ def create_app(config_object="config.DevConfig"):
          db.session.remove()
     
     register_errorhandlers(app)
+    register_commands(app)
 
     with app.app_context():
         db.create_all()
@@ -54,6 +56,29 @@ def create_app(config_object="config.DevConfig"):
 
     return app
 
+def register_commands(app):
+    @app.cli.command("ingest-worker")
+    @click.option("--poll-interval", default=5, show_default=True,
+                  help="Seconds between scans of the pending folders.")
+    def ingest_worker(poll_interval):
+        """Ingest contract and seller files from the pending folders until SIGTERM."""
+        from .services.ingest_daemon import run_ingest_worker
+        run_ingest_worker(poll_interval=poll_interval)
+
+    @app.cli.command("sync-brands")
+    def sync_brands():
+        """Rebuild brands and product counts from contract items (repair job)."""
+        from .services.brand_sync_service import sync_brands_from_contracts
+        found, inserted = sync_brands_from_contracts()
+        click.echo(f"{found} brands in contracts, {inserted} inserted")
+
+    @app.cli.command("rebuild-rollups")
+    def rebuild_rollups():
+        """Recompute the monthly analytics rollups from contracts (repair job)."""
+        from .repositories.rollup_repository import rebuild
+        rows = rebuild()
+        click.echo(f"{rows} rollup rows")
+
 def register_errorhandlers(app):
     @app.errorhandler(403)
     def forbidden_error(error):
@@ -7,7 +7,7 @@ from functools import wraps
 from ..forms.auth import UserForm
 from ..repositories import user_repository
 from ..extensions import db
-from ..models.contract import Contract
+from ..models.contract import Contract, ContractItem
 from ..models.seller import Seller
 import json
 
@@ -196,14 +196,11 @@ def admin_user_toggle_block(user_id):
 @admin_required
 def search_brands():
     term = request.args.get("term", "").lower()
-    contracts = db.session.query(Contract.items).distinct().all()
+    rows = db.session.query(ContractItem.brand).filter(ContractItem.brand.isnot(None)).distinct()
     brands_set = set()
-    for (items_json,) in contracts:
-        if isinstance(items_json, list):
-            for item in items_json:
-                brand = item.get("brand")
-                if brand and brand != "NaN":
-                    brands_set.add(str(brand).strip())
+    for (brand,) in rows:
+        if brand and brand != "NaN":
+            brands_set.add(brand.strip())
     # Perform case-insensitive filtering
     if term:
         brands = [b for b in brands_set if term in b.lower()]
@@ -250,7 +247,25 @@ from ..forms.contract_form import ContractForm
 from ..forms.brand_form import BrandForm
 from ..extensions import db
 import pandas as pd
+from ..repositories import ingest_repository
+from ..services import contract_excel_worker, master_data_worker, seller_excel_worker
+from ..services.uploads import spool_upload
+
+
+def _queue_upload(file, folder, worker, next_url):
+    """
+    Spool an upload into a pending folder and answer with the job id
+    straight away (JSON for API clients). `flask ingest-worker` picks the
+    file up; nothing is parsed in the web process.
+    """
+    job_id = spool_upload(file, folder, worker)
+    status_url = url_for("dashboard.job_status", job_id=job_id)
 
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({"job_id": job_id, "status": "queued", "status_url": status_url}), 202
+
+    flash(f"File queued for import as job {job_id}. Progress: {status_url}", "success")
+    return redirect(next_url)
 
 
 @dashboard_bp.route("/admin/categories/upload_excel", methods=["GET", "POST"])
@@ -258,7 +273,6 @@ import pandas as pd
 @admin_required
 def admin_category_upload_excel():
     form = UserForm()
-    imported_categories = []
     if request.method == "POST":
         if 'excel_file' not in request.files:
             flash("No file part", "danger")
@@ -270,22 +284,11 @@ def admin_category_upload_excel():
         if not (file.filename.endswith('.xls') or file.filename.endswith('.xlsx')):
             flash("Please upload an Excel file (.xls or .xlsx)", "danger")
             return redirect(request.url)
-        try:
-            df = pd.read_excel(file)
-            required_columns = {'value', 'text'}
-            if not required_columns.issubset(df.columns.str.lower()):
-                flash(f"Excel must contain columns: {', '.join(required_columns)}", "danger")
-                return redirect(request.url)
-            df.columns = df.columns.str.lower()
-            count = 0
-            for _, row in df.iterrows():
-                category_repository.add_category(row['value'], row['text'])
-                count += 1
-            flash(f"Successfully imported {count} categories.", "success")
-            imported_categories = df.to_dict(orient='records')
-        except Exception as e:
-            flash(f"Failed to process Excel file: {str(e)}", "danger")
-    return render_template("admin_user_upload_excel.html", form=form, action="Upload Categories", categories=imported_categories)
+        return _queue_upload(
+            file, master_data_worker.PENDING["categories"], "categories",
+            url_for("dashboard.admin_category_manage")
+        )
+    return render_template("admin_user_upload_excel.html", form=form, action="Upload Categories", categories=[])
 
 @dashboard_bp.route("/admin/categories/manage", methods=["GET", "POST"])
 @login_required
@@ -327,7 +330,7 @@ def admin_category_manage():
 @admin_required
 def manage_contracts():
     form = ContractForm()
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     filters = {k: v for k, v in {
         'status': request.args.get('status', type=str),
         'organization_type': request.args.get('organization_type', type=str),
@@ -342,7 +345,7 @@ def manage_contracts():
         'contract_date': request.args.get('contract_date', type=str),
         'total': request.args.get('total', type=float)
     }.items() if v is not None and v != ''}
-    contracts_paginated = contract_repository.get_contracts_filtered_paginated(filters, page=page, per_page=50)
+    contracts_paginated = contract_repository.get_contracts_filtered_paginated(filters, cursor=cursor, per_page=50)
     contracts = contracts_paginated.items
     if form.validate_on_submit():
         data = form.data.copy()
@@ -375,33 +378,6 @@ def bulk_delete_contracts():
     flash(f"Deleted {deleted_count} contracts.", "success")
     return redirect(url_for('dashboard.manage_contracts'))
 
-def get_unique_items(items):
-    seen = set()
-    unique_items = []
-    for item in items:
-        raw_service = item.get('service')
-        raw_product = item.get('product')
-
-        def clean_key(value):
-            if isinstance(value, str):
-                return value.strip().lower()
-            elif value is None or (isinstance(value, float) and pd.isna(value)):
-                return ''
-            else:
-                return str(value).strip().lower()
-
-        service_key = clean_key(raw_service)
-        product_key = clean_key(raw_product)
-
-        # Use service_key if present, else product_key as uniqueness key
-        unique_key = service_key or product_key
-
-        if unique_key and unique_key not in seen:
-            seen.add(unique_key)
-            unique_items.append(item)
-
-    return unique_items
-
 @dashboard_bp.route("/admin/contracts/upload_excel", methods=["GET", "POST"])
 @login_required
 @admin_required
@@ -415,79 +391,12 @@ def upload_contracts_excel():
             flash("Upload a valid Excel file (.xls or .xlsx)", "danger")
             return redirect(request.url)
 
-        # 🔵 ADD: reset file pointer (CRITICAL for large files)
-        file.stream.seek(0)
-
-        # 🔵 ADD: safe Excel reading with explicit engine
-        try:
-            df = pd.read_excel(file, engine="openpyxl")
-        except Exception as e:
-            flash(f"Failed to read Excel file: {str(e)}", "danger")
-            return redirect(request.url)
-
-        # 🔵 ADD: empty Excel check
-        if df.empty:
-            flash("Uploaded Excel file is empty.", "danger")
-            return redirect(request.url)
-
-        # existing code (unchanged)
-        df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
-
-        # 🔵 ADD: required column validation
-        required_columns = {
-            'contract_id', 'status', 'organization_type', 'ministry', 'department',
-            'organization_name', 'office_zone', 'location', 'buyer_designation',
-            'buying_mode', 'bid_number', 'contract_date', 'total',
-            'service', 'category_name', 'product', 'brand', 'model',
-            'hsn_code', 'ordered_quantity', 'price'
-        }
-
-        missing = required_columns - set(df.columns)
-        if missing:
-            flash(f"Missing required columns: {', '.join(missing)}", "danger")
-            return redirect(request.url)
-
-        # existing code (unchanged)
-        contract_map = {}
-        contract_fields = [
-            'contract_id', 'status', 'organization_type', 'ministry', 'department',
-            'organization_name', 'office_zone', 'location', 'buyer_designation',
-            'buying_mode', 'bid_number', 'contract_date', 'total'
-        ]
-
-        item_fields = [
-            'service', 'category_name', 'product', 'brand',
-            'model', 'hsn_code', 'ordered_quantity', 'price'
-        ]
-
-        for _, row in df.iterrows():
-            cid = row['contract_id']
-            if cid not in contract_map:
-                contract_map[cid] = {f: row.get(f) for f in contract_fields}
-                contract_map[cid]['items'] = []
-
-            item = {f: row.get(f) for f in item_fields}
-            contract_map[cid]['items'].append(item)
-
-        # existing code (unchanged)
-        contracts = []
-        for cid, contract_data in contract_map.items():
-            contract_data['items'] = get_unique_items(contract_data['items'])
-            contracts.append(contract_data)
-
-        count = 0
-
-        # 🔵 ADD: DB save protection
-        for contract_data in contracts:
-            try:
-                if contract_repository.add_contract(contract_data):
-                    count += 1
-            except Exception as e:
-                # skip failed contract but continue others
-                continue
-
-        flash(f"Successfully imported {count} contracts.", "success")
-        return redirect(url_for('dashboard.manage_contracts'))
+        # Parsing, column validation and the import run in the contract
+        # worker; a bad file shows up as a failed job with the reason
+        return _queue_upload(
+            file, contract_excel_worker.PENDING, contract_excel_worker.WORKER,
+            url_for('dashboard.manage_contracts')
+        )
 
     return render_template("admin_contract_upload.html", form=form)
 
@@ -538,21 +447,10 @@ def admin_brand_upload_excel():
         if not file or not (file.filename.endswith('.xls') or file.filename.endswith('.xlsx')):
             flash("Please upload a valid Excel file (.xls or .xlsx)", "danger")
             return redirect(request.url)
-        df = pd.read_excel(file)
-        df.columns = [c.strip().lower().replace(' ', '_') for c in df.columns]
-        required_cols = {'code', 'product_count', 'brand'}
-        if not required_cols.issubset(df.columns):
-            flash("Excel file missing required columns: code, product_count, brand", "danger")
-            return redirect(request.url)
-        count = 0
-        for _, row in df.iterrows():
-            code_val = row['code'] if not pd.isna(row['code']) else 'Unknown'
-            product_count_val = int(row['product_count']) if not pd.isna(row['product_count']) else 0
-            brand_val = row['brand'] if not pd.isna(row['brand']) else 'Unknown'
-            brand_repository.add_brand(code_val, product_count_val, brand_val)
-            count += 1
-        flash(f"Successfully imported {count} brands.", "success")
-        return redirect(url_for("dashboard.admin_brand_manage"))
+        return _queue_upload(
+            file, master_data_worker.PENDING["brands"], "brands",
+            url_for("dashboard.admin_brand_manage")
+        )
     return render_template("admin_brand_upload.html")
 
 # -----------------------------seller----------------------------
@@ -562,7 +460,7 @@ def admin_brand_upload_excel():
 @login_required
 def manage_sellers():
     form = SellerForm()
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     filters = {k: v for k, v in {
         'contract_no': request.args.get('contract_no', type=str),
         'category_name': request.args.get('category_name', type=str),
@@ -574,7 +472,7 @@ def manage_sellers():
         'gstin': request.args.get('gstin', type=str),
         'generated_date': request.args.get('generated_date', type=str),
     }.items() if v}
-    sellers_paginated = seller_repository.get_sellers_filtered_paginated(filters, page=page)
+    sellers_paginated = seller_repository.get_sellers_filtered_paginated(filters, cursor=cursor)
     sellers = sellers_paginated.items
 
     if form.validate_on_submit():
@@ -621,26 +519,10 @@ def upload_sellers_excel():
             flash("Upload a valid Excel file (.xls or .xlsx)", "danger")
             return redirect(request.url)
 
-        def clean_column_name(c):
-            c = c.strip().lower()
-            c = c.replace(' ', '_')
-            c = re.sub(r'[^\w]', '', c)  # remove dots and other punctuation
-            return c
-
-        df = pd.read_excel(file)
-        df.columns = [clean_column_name(c) for c in df.columns]
-
-        seller_fields = ['contract_no', 'generated_date', 'category_name', 'seller_id', 'company_name',
-                         'contact_no', 'email', 'address', 'msme_reg_no', 'gstin']
-
-        count = 0
-        for _, row in df.iterrows():
-            data = {field: row.get(field) for field in seller_fields}
-            if seller_repository.add_or_update_seller(data):
-                count += 1
-
-        flash(f"Successfully imported {count} sellers.", "success")
-        return redirect(url_for('dashboard.manage_sellers'))
+        return _queue_upload(
+            file, seller_excel_worker.PENDING, seller_excel_worker.WORKER,
+            url_for('dashboard.manage_sellers')
+        )
 
     return render_template('admin_seller_upload.html', form=form)
 
@@ -659,6 +541,7 @@ from flask import current_app
 
 from ..services.contract_excel_worker import (
     process_next_pending,
+    process_all_pending,
     retry_all_failed,
     load_progress
 )
@@ -719,6 +602,19 @@ def process_pending():
     return jsonify({"status": "started"})
 
 
+# =================================================
+# PROCESS ALL PENDING EXCEL FILES (PARALLEL PARSE)
+# =================================================
+@dashboard_bp.route("/admin/contracts/process-all", methods=["POST"])
+@login_required
+def process_all():
+    if not current_user.is_admin:
+        abort(403)
+
+    run_bg(process_all_pending)
+    return jsonify({"status": "started"})
+
+
 # =================================================
 # RETRY ALL FAILED FILES
 # =================================================
@@ -799,6 +695,19 @@ def seller_progress_api():
     return jsonify(seller_progress())
 
 
+# ---------------- UPLOAD JOBS ----------------
+
+@dashboard_bp.route("/admin/jobs/<job_id>", methods=["GET"])
+@login_required
+def job_status(job_id):
+    if not current_user.is_admin:
+        abort(403)
+    job = ingest_repository.get_job(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(job)
+
+
 
 
 
@@ -812,63 +721,7 @@ from ..extensions import db
 from ..models.brand import Brand
 from ..models.contract import Contract
 from ..forms.brand_form import BrandForm
-
-
-# =====================================================
-# Helper: extract EXACT brand names from contracts
-# =====================================================
-
-def extract_exact_brands_from_contracts():
-    """
-    Returns a set of brand names EXACTLY as stored in contracts
-    (only trims leading/trailing spaces).
-    """
-    brands = set()
-
-    contracts = Contract.query.with_entities(Contract.items).all()
-    for (items,) in contracts:
-        if not items:
-            continue
-
-        for item in items:
-            if isinstance(item, dict):
-                brand = item.get("brand")
-                if isinstance(brand, str):
-                    brand = brand.strip()
-                    if brand:
-                        brands.add(brand)
-
-    return brands
-
-
-# =====================================================
-# Core logic: upload brands from contracts (exact)
-# =====================================================
-
-def upload_brands_from_contracts_exact():
-    # Existing brand names (exact match)
-    existing = {
-        b.name for b in Brand.query.with_entities(Brand.name).all()
-    }
-
-    found = extract_exact_brands_from_contracts()
-
-    inserted = 0
-    for brand_name in found:
-        if brand_name in existing:
-            continue
-
-        db.session.add(
-            Brand(
-                code=brand_name[:200],   # auto-generated code
-                name=brand_name,         # EXACT SAME NAME
-                product_count=0
-            )
-        )
-        inserted += 1
-
-    db.session.commit()
-    return len(found), inserted
+from ..services.brand_sync_service import sync_brands_from_contracts
 
 
 # =====================================================
@@ -886,9 +739,8 @@ def admin_brand_manage_page():
 
     # Delete brand
     if delete_id:
-        brand = Brand.query.get_or_404(delete_id)
-        db.session.delete(brand)
-        db.session.commit()
+        Brand.query.get_or_404(delete_id)
+        brand_repository.delete_brand(delete_id)
         flash("Brand deleted successfully.", "success")
         return redirect(url_for("dashboard.admin_brand_manage_page"))
 
@@ -907,13 +759,17 @@ def admin_brand_manage_page():
             editing_brand.product_count = form.product_count.data
             editing_brand.name = form.name.data
         else:
-            db.session.add(
-                Brand(
-                    code=form.code.data,
-                    product_count=form.product_count.data,
-                    name=form.name.data
-                )
+            editing_brand = Brand(
+                code=form.code.data,
+                product_count=form.product_count.data,
+                name=form.name.data
             )
+            db.session.add(editing_brand)
+        db.session.flush()
+        # The (new) name resolves to this brand from now on
+        brand_repository.add_aliases({
+            brand_repository.brand_key(editing_brand.name): editing_brand.id
+        })
         db.session.commit()
         flash("Brand saved successfully.", "success")
         return redirect(url_for("dashboard.admin_brand_manage_page"))
@@ -936,7 +792,7 @@ def admin_brand_manage_page():
 @admin_required
 def admin_upload_brands_from_contracts_exact():
 
-    total_found, inserted = upload_brands_from_contracts_exact()
+    total_found, inserted = sync_brands_from_contracts()
 
     flash(
         f"Upload completed. Found {total_found} brands in contracts, "
@@ -3,11 +3,13 @@
 from flask import Blueprint, render_template, request, abort
 from flask_login import login_required, current_user
 from datetime import datetime
-from sqlalchemy import and_
+from sqlalchemy import and_, func
 from ..models.seller import Seller
-from ..models.contract import Contract
+from ..models.contract import Contract, ContractItem
 from flask import Blueprint, render_template, request, jsonify
 from ..repositories.analytics_repository import AnalyticsRepository
+from ..repositories import brand_repository, contract_repository
+from ..repositories.search import apply_text_filters
 from ..extensions import db
 
 # user_bp = Blueprint("user", __name__, url_prefix="/user")
@@ -50,6 +52,7 @@ def parse_dynamic_filters(args):
     return filters
 
 def apply_contract_filters(query, filters):
+    text_filters = {}
     for field, value in filters.items():
         if field == "contract_date":
             try:
@@ -64,18 +67,12 @@ def apply_contract_filters(query, filters):
         else:
             column = getattr(Contract, field, None)
             if column is not None:
-                query = query.filter(column.ilike(f"%{value}%"))
-    return query
+                text_filters[field] = value
+    return apply_text_filters(query, Contract, text_filters)
 
-def contract_brand_match(contract, brand_set):
-    contract_items = contract.items or []
-    if not brand_set:
-        return True
-    for item in contract_items:
-        brand = safe_to_str(item.get('brand', ''))
-        if brand and brand in brand_set:
-            return True
-    return False
+def user_brand_ids(user):
+    """Canonical brand ids of the user's brand_names."""
+    return brand_repository.brand_ids_for_names((user.brand_names or "").split(","))
 
 class Pagination:
     def __init__(self, page, per_page, total):
@@ -103,7 +100,7 @@ def user_contracts():
     assigned_start = current_user.assigned_date_range_start
     assigned_end = current_user.assigned_date_range_end
 
-    page = request.args.get('page', 1, type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
     per_page = 10
 
     filters = parse_dynamic_filters(request.args)
@@ -147,19 +144,18 @@ def user_contracts():
     # Apply other dynamic filters
     base_query = apply_contract_filters(base_query, filters)
 
-    # Order by contract_date DESC
-    base_query = base_query.order_by(Contract.contract_date.desc())
-
-    # Fetch contracts
-    contracts = base_query.all()
-
-    # Brand filtering
-    filtered_contracts = [c for c in contracts if contract_brand_match(c, brand_set)]
-
-    total = len(filtered_contracts)
-    start = (page - 1) * per_page
-    end = start + per_page
-    paginated_contracts = filtered_contracts[start:end]
+    # Brand filtering, as a semi-join in the same query
+    base_query = contract_repository.filter_by_brand_ids(base_query, user_brand_ids(current_user))
+
+    # Count in SQL and load only the requested page, newest first (id
+    # breaks ties so pages never overlap)
+    total = base_query.with_entities(func.count(Contract.id)).order_by(None).scalar()
+    paginated_contracts = (
+        base_query.order_by(Contract.contract_date.desc(), Contract.id.desc())
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+        .all()
+    )
 
     pagination = Pagination(page, per_page, total)
 
@@ -326,11 +322,9 @@ def parse_seller_filters(args):
     return filters
 
 def apply_seller_filters(query, filters):
-    for field, value in filters.items():
-        column = getattr(Seller, field, None)
-        if column is not None:
-            query = query.filter(column.ilike(f"%{value}%"))
-    return query
+    return apply_text_filters(query, Seller, {
+        field: value for field, value in filters.items() if getattr(Seller, field, None) is not None
+    })
 
 class Pagination:
     def __init__(self, page, per_page, total):
@@ -443,7 +437,6 @@ def get_contracts_by_contract_nos():
     if not contract_nos or not isinstance(contract_nos, list):
         abort(400, "Invalid contract numbers")
 
-    brand_set = parse_list_csv(current_user.brand_names)
     assigned_start = current_user.assigned_date_range_start
     assigned_end = current_user.assigned_date_range_end
 
@@ -456,18 +449,12 @@ def get_contracts_by_contract_nos():
             Contract.contract_date.between(assigned_start, assigned_end)
         )
 
-    contracts = query.order_by(Contract.contract_date.desc()).all()
-
-    # Brand restriction (same logic you already use)
-    def contract_brand_match(contract):
-        for item in contract.items or []:
-            if isinstance(item, dict):
-                brand = safe_to_str(item.get("brand"))
-                if brand and brand in brand_set:
-                    return True
-        return True
+    # Brand restriction (same semi-join as /contracts). Contracts without
+    # an item of the user's brands are left out; the per-item check this
+    # replaced never matched and returned every requested contract.
+    query = contract_repository.filter_by_brand_ids(query, user_brand_ids(current_user))
 
-    filtered_contracts = [c for c in contracts if contract_brand_match(c)]
+    filtered_contracts = query.order_by(Contract.contract_date.desc()).all()
 
     # 🔄 Serialize
     return jsonify([
@@ -586,7 +573,12 @@ def parse_filters(args):
         "date_to": args.get("date_to") or None,
         "min_total": float(args["min_total"]) if args.get("min_total") else None,
         "max_total": float(args["max_total"]) if args.get("max_total") else None,
-        'brands': args.getlist('brands[]')
+        'brands': args.getlist('brands[]'),
+        'categories': args.getlist('categories[]'),
+        'products': args.getlist('products[]'),
+        'hsn_codes': args.getlist('hsn_codes[]'),
+        # value_over_time bucket: month (default), week or day
+        "interval": args.get("interval") or None,
     }
 
     # print("Filters received:", filters)
@@ -730,21 +722,15 @@ def brand_compare():
         abort(400)
 
     # Validate user brand
-    user_brand_set = parse_list_csv(current_user.brand_names)
-    if brand1.lower() not in user_brand_set:
+    brand1_ids = brand_repository.brand_ids_for_names([brand1])
+    if not brand1_ids or not brand1_ids <= user_brand_ids(current_user):
         abort(403)
 
     # Validate competitor exists
-    brand_exists = False
-    for c in Contract.query.all():
-        for item in c.items or []:
-            if isinstance(item, dict):
-                b = safe_to_str(item.get("brand"))
-                if b.lower() == brand2.lower():
-                    brand_exists = True
-                    break
-        if brand_exists:
-            break
+    brand2_ids = brand_repository.brand_ids_for_names([brand2])
+    brand_exists = bool(brand2_ids) and db.session.query(
+        ContractItem.query.filter(ContractItem.brand_id.in_(brand2_ids)).exists()
+    ).scalar()
 
     if not brand_exists:
         abort(404)
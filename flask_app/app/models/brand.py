@@ -7,5 +7,17 @@ class Brand(db.Model):
     product_count = db.Column(db.Integer)
     name = db.Column(db.String(255), nullable=False)
 
+    aliases = db.relationship('BrandAlias', cascade='all, delete-orphan')
+
     def __repr__(self):
         return f"<Brand {self.code}>"
+
+
+class BrandAlias(db.Model):
+    __tablename__ = 'brand_aliases'
+    id = db.Column(db.Integer, primary_key=True)
+    # brand_repository.brand_key() of a spelling seen in contracts or the brand master
+    alias = db.Column(db.String(255), unique=True, nullable=False)
+    brand_id = db.Column(
+        db.Integer, db.ForeignKey('brands.id', ondelete='CASCADE'), nullable=False, index=True
+    )
@@ -1,6 +1,23 @@
 from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy.orm import validates
 from ..extensions import db
 
+
+def contract_date_keys(value):
+    """
+    Integer month (yyyymm), day (yyyymmdd) and ISO week (yyyyww) keys of a
+    contract date, for index-friendly time-series grouping.
+    """
+    if value is None:
+        return dict(contract_yyyymm=None, contract_yyyymmdd=None, contract_yyyyww=None)
+    iso_year, iso_week, _ = value.isocalendar()
+    return dict(
+        contract_yyyymm=value.year * 100 + value.month,
+        contract_yyyymmdd=(value.year * 100 + value.month) * 100 + value.day,
+        contract_yyyyww=iso_year * 100 + iso_week,
+    )
+
+
 class Contract(db.Model):
     __tablename__ = 'contracts'
     id = db.Column(db.Integer, primary_key=True)
@@ -16,5 +33,114 @@ class Contract(db.Model):
     buying_mode = db.Column(db.String(100))
     bid_number = db.Column(db.String(100))
     contract_date = db.Column(db.DateTime)
+    # Derived from contract_date, see contract_date_keys
+    contract_yyyymm = db.Column(db.Integer)
+    contract_yyyymmdd = db.Column(db.Integer)
+    contract_yyyyww = db.Column(db.Integer)
     total = db.Column(db.Float)
-    items = db.Column(JSON)  # JSON array of item dicts
+    # Legacy JSON array of item dicts; items now live in contract_items
+    items_json = db.Column('items', JSON)
+
+    item_rows = db.relationship(
+        'ContractItem',
+        order_by='ContractItem.id',
+        lazy='selectin',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+    )
+
+    __table_args__ = (
+        # Date-range list and analytics filters, alone or under an equality
+        # filter; see benchmarks/plans.py
+        db.Index('ix_contracts_contract_date', 'contract_date'),
+        db.Index('ix_contracts_status_contract_date', 'status', 'contract_date'),
+        db.Index('ix_contracts_buying_mode_contract_date', 'buying_mode', 'contract_date'),
+        # Time series group on the date keys; total makes the monthly sums
+        # index-only
+        db.Index('ix_contracts_yyyymm_total', 'contract_yyyymm', 'total'),
+        db.Index('ix_contracts_yyyymmdd', 'contract_yyyymmdd'),
+        db.Index('ix_contracts_yyyyww', 'contract_yyyyww'),
+    )
+
+    @validates('contract_date')
+    def _set_date_keys(self, key, value):
+        for name, date_key in contract_date_keys(value).items():
+            setattr(self, name, date_key)
+        return value
+
+    @property
+    def items(self):
+        """Item dicts in first-seen order, as the items JSON column used to hold them."""
+        if self.item_rows:
+            return [item.to_dict() for item in self.item_rows]
+        return self.items_json or []
+
+
+class ContractItem(db.Model):
+    __tablename__ = 'contract_items'
+    id = db.Column(db.Integer, primary_key=True)
+    contract_id = db.Column(
+        db.Integer, db.ForeignKey('contracts.id', ondelete='CASCADE'), nullable=False
+    )
+    # Lowercased service, or product when there is no service
+    dedupe_key = db.Column(db.String(255), nullable=False)
+    service = db.Column(db.String(512))
+    category_name = db.Column(db.String(255))
+    product = db.Column(db.String(512))
+    brand = db.Column(db.String(255))
+    # Canonical brand of `brand`, resolved through brand_aliases at ingest
+    brand_id = db.Column(db.Integer, db.ForeignKey('brands.id', ondelete='SET NULL'))
+    model = db.Column(db.String(255))
+    hsn_code = db.Column(db.String(100))
+    ordered_quantity = db.Column(db.Float)
+    price = db.Column(db.Float)
+
+    __table_args__ = (
+        db.UniqueConstraint('contract_id', 'dedupe_key', name='uq_contract_items_contract_key'),
+        # Item filters are EXISTS semi-joins on contract_id; with it as the
+        # second column they are answered from the index alone
+        db.Index('ix_contract_items_brand_id_contract', 'brand_id', 'contract_id'),
+        db.Index('ix_contract_items_category_contract', 'category_name', 'contract_id'),
+        db.Index('ix_contract_items_product_contract', 'product', 'contract_id'),
+        db.Index('ix_contract_items_hsn_code_contract', 'hsn_code', 'contract_id'),
+    )
+
+    def to_dict(self):
+        quantity = self.ordered_quantity
+        if quantity is not None and quantity.is_integer():
+            # Whole quantities read back as ints, like they come out of Excel
+            quantity = int(quantity)
+        return {
+            'service': self.service,
+            'category_name': self.category_name,
+            'product': self.product,
+            'brand': self.brand,
+            'model': self.model,
+            'hsn_code': self.hsn_code,
+            'ordered_quantity': quantity,
+            'price': self.price,
+        }
+
+
+# Contract count, sum(total) and count(total) per month and analytics
+# dimension, kept up to date by app/repositories/rollup_repository.py.
+# NULL keys are stored as 0 / '' so each group has exactly one row.
+# brand_id 0 covers all contracts; any other id covers the contracts that
+# have an item of that brand.
+class ContractMonthRollup(db.Model):
+    __tablename__ = 'contract_month_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+    brand_id = db.Column(db.Integer, nullable=False, default=0)
+    month = db.Column(db.Integer, nullable=False, default=0)  # contract_yyyymm
+    status = db.Column(db.String(100), nullable=False, default='')
+    buying_mode = db.Column(db.String(100), nullable=False, default='')
+    ministry = db.Column(db.String(255), nullable=False, default='')
+    contract_count = db.Column(db.Integer, nullable=False, default=0)
+    total_sum = db.Column(db.Float, nullable=False, default=0)
+    total_count = db.Column(db.Integer, nullable=False, default=0)  # contracts with a total
+
+    __table_args__ = (
+        # brand_id first: every read is for one brand over a month range
+        db.UniqueConstraint('brand_id', 'month', 'status', 'buying_mode', 'ministry',
+                            name='uq_contract_month_rollups_key'),
+    )
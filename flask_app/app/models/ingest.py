@@ -0,0 +1,34 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class IngestCheckpoint(db.Model):
+    __tablename__ = 'ingest_checkpoints'
+    id = db.Column(db.Integer, primary_key=True)
+    file_hash = db.Column(db.String(64), unique=True, nullable=False)  # sha256 of file content
+    filename = db.Column(db.String(255))
+    rows_done = db.Column(db.Integer, nullable=False, default=0)  # source rows committed so far
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='running')  # running / completed
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class IngestProgress(db.Model):
+    __tablename__ = 'ingest_progress'
+    id = db.Column(db.Integer, primary_key=True)
+    worker = db.Column(db.String(20), nullable=False)  # contracts / sellers / brands / categories
+    filename = db.Column(db.String(255), nullable=False)
+    job_id = db.Column(db.String(32), index=True)  # set for files spooled by the upload endpoints
+    status = db.Column(db.String(20), nullable=False)
+    rows_parsed = db.Column(db.Integer, nullable=False, default=0)
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    rate = db.Column(db.Float)  # rows parsed per second
+    message = db.Column(db.String(255))
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('worker', 'filename', name='uq_ingest_progress_worker_filename'),
+        db.Index('ix_ingest_progress_worker_updated_at', 'worker', 'updated_at'),
+    )
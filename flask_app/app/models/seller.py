@@ -13,3 +13,9 @@ class Seller(db.Model):
     address = db.Column(db.Text)
     msme_reg_no = db.Column(db.String(100))
     gstin = db.Column(db.String(100))
+
+    __table_args__ = (
+        db.Index('ix_sellers_generated_date', 'generated_date'),
+        # Subscriber category filter compares lower(category_name)
+        db.Index('ix_sellers_lower_category_name', db.func.lower(category_name)),
+    )
@@ -85,3 +85,7 @@ class UserHistory(db.Model):
     user_id = db.Column(db.Integer, nullable=False)
     data_snapshot = db.Column(db.Text, nullable=False)  # JSON string snapshot of user state
     changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_user_history_user_id_changed_at', 'user_id', 'changed_at'),
+    )
@@ -22,9 +22,59 @@ def safe_to_str(value):
         else:
             return str(value).strip().lower()
 from sqlalchemy import func, extract
-from app.models.contract import Contract
+from app.models.contract import Contract, ContractItem
 from app import db
-from sqlalchemy import func, extract, or_
+from sqlalchemy import func, extract, or_, and_
+from app.repositories import brand_repository, rollup_repository
+from app.repositories.search import apply_text_filters
+
+
+def _month_label(key):
+    return f"{key // 100:04d}-{key % 100:02d}"
+
+
+def _week_label(key):
+    return f"{key // 100:04d}-W{key % 100:02d}"
+
+
+def _day_label(key):
+    return f"{key // 10000:04d}-{key // 100 % 100:02d}-{key % 100:02d}"
+
+
+# interval -> (integer date key column, label of a key)
+TIME_BUCKETS = {
+    "month": (Contract.contract_yyyymm, _month_label),
+    "week": (Contract.contract_yyyyww, _week_label),
+    "day": (Contract.contract_yyyymmdd, _day_label),
+}
+
+# Rollup dimension -> the contracts column it groups
+ROLLUP_DIMENSIONS = {
+    "status": Contract.status,
+    "buying_mode": Contract.buying_mode,
+    "ministry": Contract.ministry,
+    "month": Contract.contract_yyyymm,
+}
+
+
+def _month_key(value):
+    """(yyyymm, day) of a YYYY-MM-DD filter value; ValueError for anything else."""
+    day = datetime.strptime(value, "%Y-%m-%d")
+    if day.strftime("%Y-%m-%d") != value:
+        raise ValueError(value)
+    return day.year * 100 + day.month, day.day
+
+
+def _next_month(key):
+    return key + 89 if key % 100 == 12 else key + 1
+
+
+def _previous_month(key):
+    return key - 89 if key % 100 == 1 else key - 1
+
+
+def _none_first(value):
+    return (value is not None, value)
 
 
 class AnalyticsRepository:
@@ -41,9 +91,7 @@ class AnalyticsRepository:
             query = query.filter(Contract.buying_mode == filters["buying_mode"])
 
         if filters.get("ministry"):
-            query = query.filter(
-                Contract.ministry.ilike(f"%{filters['ministry']}%")
-            )
+            query = apply_text_filters(query, Contract, {"ministry": filters["ministry"]})
 
         if filters.get("date_from"):
             query = query.filter(Contract.contract_date >= filters["date_from"])
@@ -66,21 +114,103 @@ class AnalyticsRepository:
         #                 Contract.items[0]['brand'].astext == brand
         #             )
         #         query = query.filter(or_(*brand_conditions))
+        # Item filters: contracts with at least one item matching all of
+        # them, as one IN (SELECT contract_id ...) semi-join that is driven
+        # by the contract_items (column, contract_id) indexes
+        item_conditions = []
         if filters.get("brands"):
-         brands = filters["brands"]
- 
-         brand_conditions = [
-             cast(Contract.items, String).ilike(f'%\"brand\": \"{b}\"%')
-             for b in brands
-         ]
- 
-         query = query.filter(or_(*brand_conditions))
+            brand_ids = brand_repository.brand_ids_for_names(filters["brands"])
+            item_conditions.append(ContractItem.brand_id.in_(brand_ids))
+
+        if filters.get("categories"):
+            item_conditions.append(ContractItem.category_name.in_(filters["categories"]))
+
+        if filters.get("products"):
+            item_conditions.append(ContractItem.product.in_(filters["products"]))
+
+        if filters.get("hsn_codes"):
+            item_conditions.append(ContractItem.hsn_code.in_(filters["hsn_codes"]))
+
+        if item_conditions:
+            query = query.filter(Contract.id.in_(
+                db.session.query(ContractItem.contract_id).filter(and_(*item_conditions))
+            ))
         return query
+
+    # -------------------------
+    # ROLLUPS
+    # -------------------------
+    @staticmethod
+    def rollup_totals(filters, dimension):
+        """
+        {value of `dimension`: [contracts, sum(total), count(total)]} for the
+        filtered contracts, or None when the filters are finer than the
+        rollups (totals, item categories/products/HSN codes, several
+        brands). Whole months come from the rollups; months the date range
+        only partly covers are aggregated from their raw rows.
+        """
+        if filters.get("min_total") is not None or filters.get("max_total") is not None:
+            return None
+        if filters.get("categories") or filters.get("products") or filters.get("hsn_codes"):
+            return None
+
+        brand_id = rollup_repository.ALL_BRANDS
+        if filters.get("brands"):
+            brand_ids = brand_repository.brand_ids_for_names(filters["brands"])
+            if len(brand_ids) != 1:
+                return None
+            brand_id = brand_ids.pop()
+
+        first_month = last_month = None
+        edge_months = set()
+        try:
+            if filters.get("date_from"):
+                first_month, day = _month_key(filters["date_from"])
+                if day != 1:
+                    edge_months.add(first_month)
+                    first_month = _next_month(first_month)
+            if filters.get("date_to"):
+                # date_to compares against a datetime, so its month is always partial
+                last_month, _ = _month_key(filters["date_to"])
+                edge_months.add(last_month)
+                last_month = _previous_month(last_month)
+        except ValueError:
+            return None
+
+        totals = {}
+        if first_month is None or last_month is None or first_month <= last_month:
+            totals = rollup_repository.grouped_totals(
+                dimension, brand_id,
+                status=filters.get("status"),
+                buying_mode=filters.get("buying_mode"),
+                ministry=filters.get("ministry"),
+                first_month=first_month,
+                last_month=last_month,
+            )
+
+        if edge_months:
+            column = ROLLUP_DIMENSIONS[dimension]
+            query = db.session.query(
+                column, func.count(Contract.id), func.sum(Contract.total), func.count(Contract.total)
+            ).filter(Contract.contract_yyyymm.in_(edge_months))
+            query = AnalyticsRepository.apply_filters(query, filters).group_by(column)
+            for key, count, total_sum, total_count in query:
+                entry = totals.setdefault(key, [0, 0.0, 0])
+                entry[0] += count
+                entry[1] += total_sum or 0
+                entry[2] += total_count
+
+        return totals
+
     # -------------------------
     # CONTRACTS BY STATUS
     # -------------------------
     @staticmethod
     def get_contracts_by_status(filters):
+        totals = AnalyticsRepository.rollup_totals(filters, "status")
+        if totals is not None:
+            return [(status, totals[status][0]) for status in sorted(totals, key=_none_first)]
+
         query = db.session.query(
             Contract.status,
             func.count(Contract.id)
@@ -98,18 +228,28 @@ class AnalyticsRepository:
     # -------------------------
     @staticmethod
     def get_value_over_time(filters):
-        month_expr = func.strftime('%Y-%m', Contract.contract_date)
+        # Grouped on the precomputed integer key rather than a per-row
+        # strftime, so it is index-ordered and portable
+        bucket, label = TIME_BUCKETS.get(filters.get("interval"), TIME_BUCKETS["month"])
+
+        if bucket is Contract.contract_yyyymm:
+            totals = AnalyticsRepository.rollup_totals(filters, "month")
+            if totals is not None:
+                return [
+                    (label(key) if key is not None else None, total_sum if total_count else None)
+                    for key, (_, total_sum, total_count) in sorted(totals.items(), key=lambda t: _none_first(t[0]))
+                ]
 
         query = db.session.query(
-            month_expr.label("date"),
+            bucket,
             func.sum(Contract.total)
         )
 
         query = AnalyticsRepository.apply_filters(query, filters)
 
-        query = query.group_by(month_expr).order_by(month_expr)
+        query = query.group_by(bucket).order_by(bucket)
 
-        return query.all()
+        return [(label(key) if key is not None else None, total) for key, total in query]
 
 
     # -------------------------
@@ -117,6 +257,15 @@ class AnalyticsRepository:
     # -------------------------
     @staticmethod
     def get_top_ministries(filters, limit=10):
+        totals = AnalyticsRepository.rollup_totals(filters, "ministry")
+        if totals is not None:
+            sums = [
+                (ministry, total_sum if total_count else None)
+                for ministry, (_, total_sum, total_count) in totals.items()
+            ]
+            sums.sort(key=lambda t: (t[1] is not None, t[1] or 0), reverse=True)
+            return sums[:limit]
+
         query = db.session.query(
             Contract.ministry,
             func.sum(Contract.total)
@@ -135,6 +284,13 @@ class AnalyticsRepository:
     # -------------------------
     @staticmethod
     def get_avg_by_buying_mode(filters):
+        totals = AnalyticsRepository.rollup_totals(filters, "buying_mode")
+        if totals is not None:
+            return [
+                (mode, totals[mode][1] / totals[mode][2] if totals[mode][2] else None)
+                for mode in sorted(totals, key=_none_first)
+            ]
+
         query = db.session.query(
             Contract.buying_mode,
             func.avg(Contract.total)
@@ -165,19 +321,25 @@ class AnalyticsRepository:
     #     return query.all()
     @staticmethod
     def get_count_by_month(filters):
+        totals = AnalyticsRepository.rollup_totals(filters, "month")
+        if totals is not None:
+            return [
+                (key // 100, key % 100, totals[key][0])
+                for key in sorted(totals, key=_none_first) if key is not None
+            ]
+
         query = db.session.query(
-            extract("year", Contract.contract_date).label("year"),
-            extract("month", Contract.contract_date).label("month"),
+            Contract.contract_yyyymm,
             func.count(Contract.id).label("count")
         ).filter(
-            Contract.contract_date.isnot(None)   # 🔥 IMPORTANT
+            Contract.contract_yyyymm.isnot(None)   # 🔥 IMPORTANT
         )
     
         query = AnalyticsRepository.apply_filters(query, filters)
     
-        query = query.group_by("year", "month").order_by("year", "month")
+        query = query.group_by(Contract.contract_yyyymm).order_by(Contract.contract_yyyymm)
     
-        return query.all()
+        return [(key // 100, key % 100, count) for key, count in query]
 
 
 
@@ -199,6 +361,9 @@ class AnalyticsRepository:
     
         year, mon = map(int, month.split("-"))
     
+        start = datetime(year, mon, 1)
+        end = datetime(year + mon // 12, mon % 12 + 1, 1)
+
         def compute(brand):
             orders = 0
             revenue = 0
@@ -208,39 +373,40 @@ class AnalyticsRepository:
             buying_modes = {}
             categories = set()
     
-            contracts = Contract.query.all()
-    
-            for c in contracts:
-                if not c.contract_date:
-                    continue
-    
-                if c.contract_date.year != year or c.contract_date.month != mon:
-                    continue
-    
-                for item in c.items or []:
-                    if not isinstance(item, dict):
-                        continue
-    
-                    b = safe_to_str(item.get("brand"))
-                    if b.lower() != brand.lower():
-                        continue
+            # One row per item of the brand in the month, via the
+            # canonical brand id rather than a scan of every contract
+            brand_ids = brand_repository.brand_ids_for_names([brand])
+            rows = (
+                db.session.query(
+                    Contract.total, Contract.status, Contract.buying_mode,
+                    ContractItem.ordered_quantity, ContractItem.category_name,
+                )
+                .join(ContractItem, ContractItem.contract_id == Contract.id)
+                .filter(
+                    ContractItem.brand_id.in_(brand_ids),
+                    Contract.contract_date >= start,
+                    Contract.contract_date < end,
+                )
+                .all()
+            )
     
-                    orders += 1
-                    revenue += float(c.total or 0)
-                    quantity += int(item.get("ordered_quantity") or 0)
+            for total, status, mode, ordered_quantity, category_name in rows:
+                orders += 1
+                revenue += float(total or 0)
+                quantity += int(ordered_quantity or 0)
     
-                    # Status
-                    status = c.status or "Unknown"
-                    status_breakdown[status] = status_breakdown.get(status, 0) + 1
+                # Status
+                status = status or "Unknown"
+                status_breakdown[status] = status_breakdown.get(status, 0) + 1
     
-                    # Buying mode
-                    mode = c.buying_mode or "Unknown"
-                    buying_modes[mode] = buying_modes.get(mode, 0) + 1
+                # Buying mode
+                mode = mode or "Unknown"
+                buying_modes[mode] = buying_modes.get(mode, 0) + 1
     
-                    # Category
-                    cat = safe_to_str(item.get("category_name"))
-                    if cat:
-                        categories.add(cat)
+                # Category
+                cat = safe_to_str(category_name)
+                if cat:
+                    categories.add(cat)
     
             avg_value = revenue / orders if orders else 0
     
@@ -1,6 +1,16 @@
 import pandas as pd
+from flask import current_app
+from sqlalchemy import bindparam, func, insert, update
 from ..extensions import db
-from ..models.brand import Brand
+from ..models.brand import Brand, BrandAlias
+from ..models.contract import ContractItem
+from . import rollup_repository
+from .bulk import chunked, supports_upsert, upsert_rows
+
+# Brands discovered in contracts use their name as code, cut to this length
+DISCOVERED_CODE_LENGTH = 200
+# Length of brand_aliases.alias
+ALIAS_LENGTH = 255
 
 
 def get_all_brands():
@@ -22,6 +32,8 @@ def add_brand(code, product_count, name):
             
         brand = Brand(code=code, product_count=product_count, name=name)
         db.session.add(brand)
+        db.session.flush()
+        add_aliases({brand_key(name): brand.id})
         db.session.commit()
         return True
     except Exception as e:
@@ -29,12 +41,191 @@ def add_brand(code, product_count, name):
         return False
 
 
+def _brand_values(code, product_count, name):
+    # Same NaN handling as add_brand
+    if pd.isna(name) or str(name).lower() == 'nan':
+        name = 'Unknown Brand'
+    if pd.isna(code) or str(code).lower() == 'nan':
+        code = 'Unknown Code'
+    if pd.isna(product_count):
+        product_count = 0
+    # Codes read from a sheet can be numbers; compare and store them as the text the column holds
+    return {'code': str(code).strip(), 'product_count': int(product_count), 'name': name}
+
+
+def bulk_import_brands(rows, update_existing=False, batch_size=None):
+    """
+    Bulk add_brand for an iterable of {'code', 'product_count', 'name'}
+    dicts. Existing codes are loaded with one query; new brands are
+    inserted with executemany in chunks of `batch_size`, one commit each.
+    Rows whose code already exists are skipped, or have their name and
+    product_count updated with `update_existing`. Returns
+    (inserted, updated, skipped).
+    """
+    if batch_size is None:
+        batch_size = current_app.config.get("INGEST_BATCH_SIZE", 500)
+
+    existing = {
+        code: (brand_id, product_count, name)
+        for brand_id, code, product_count, name
+        in db.session.query(Brand.id, Brand.code, Brand.product_count, Brand.name)
+    }
+
+    new_rows = {}
+    changed = {}
+    skipped = 0
+    for row in rows:
+        try:
+            values = _brand_values(row['code'], row['product_count'], row['name'])
+        except (TypeError, ValueError):
+            skipped += 1
+            continue
+
+        code = values['code']
+        if code in existing:
+            brand_id, product_count, name = existing[code]
+            if update_existing and (product_count, name) != (values['product_count'], values['name']):
+                changed[brand_id] = dict(values, id=brand_id)
+            else:
+                skipped += 1
+        elif code in new_rows:
+            skipped += 1  # first row of a repeated code wins, as with add_brand
+        else:
+            new_rows[code] = values
+
+    for chunk in chunked(new_rows.values(), batch_size):
+        db.session.execute(insert(Brand), chunk)
+        brand_ids = dict(
+            db.session.query(Brand.code, Brand.id)
+            .filter(Brand.code.in_([row['code'] for row in chunk]))
+        )
+        add_aliases({brand_key(row['name']): brand_ids[row['code']] for row in chunk})
+        db.session.commit()
+
+    for chunk in chunked(changed.values(), batch_size):
+        db.session.execute(update(Brand), chunk)
+        # A renamed brand also answers to its new name
+        add_aliases({brand_key(row['name']): row['id'] for row in chunk})
+        db.session.commit()
+
+    return len(new_rows), len(changed), skipped
+
+
+def brand_key(name):
+    """Spelling-insensitive key of a brand name: no ™/®, single spaces, case-folded."""
+    name = str(name).replace("™", "").replace("®", "")
+    return " ".join(name.split()).casefold()[:ALIAS_LENGTH]
+
+
+def add_aliases(brand_ids):
+    """Map {alias key: brand id}, keeping any mapping that already exists. The caller commits."""
+    rows = [{'alias': key, 'brand_id': brand_id} for key, brand_id in brand_ids.items() if key]
+    if not rows:
+        return
+
+    if supports_upsert():
+        upsert_rows(BrandAlias, rows, ['alias'])
+        return
+
+    taken = {
+        alias for (alias,) in db.session.query(BrandAlias.alias)
+        .filter(BrandAlias.alias.in_([row['alias'] for row in rows]))
+    }
+    rows = [row for row in rows if row['alias'] not in taken]
+    if rows:
+        db.session.execute(insert(BrandAlias), rows)
+
+
+def _alias_ids(keys):
+    return dict(
+        db.session.query(BrandAlias.alias, BrandAlias.brand_id)
+        .filter(BrandAlias.alias.in_(keys))
+    )
+
+
+def brand_ids_for_names(names):
+    """Canonical brand ids of the given spellings (e.g. a user's brand list); unknown ones are left out."""
+    keys = {brand_key(name) for name in names if name}
+    keys.discard("")
+    if not keys:
+        return set()
+    return set(_alias_ids(keys).values())
+
+
+def resolve_brands(names):
+    """
+    {raw name: canonical brand id} for brand spellings seen in contracts.
+
+    Spellings are matched through brand_aliases by brand_key; every brand
+    answers to the key of its own name there (seeded by the brand_aliases
+    migration, added whenever a brand is saved). A key with no alias yet
+    gets a new brand named after its first spelling in `names` (code =
+    name). The caller commits.
+    """
+    keys = {name: brand_key(name) for name in dict.fromkeys(names) if name}
+    keys = {name: key for name, key in keys.items() if key}
+    if not keys:
+        return {}
+
+    ids = _alias_ids(set(keys.values()))
+    missing = {}
+    for name, key in keys.items():
+        if key not in ids:
+            missing.setdefault(key, name.strip())
+
+    if missing:
+        new_rows = [
+            {'code': name[:DISCOVERED_CODE_LENGTH], 'name': name, 'product_count': 0}
+            for name in missing.values()
+        ]
+        codes = [row['code'] for row in new_rows]
+        existing_codes = {
+            code for (code,) in db.session.query(Brand.code).filter(Brand.code.in_(codes))
+        }
+        new_rows = [row for row in new_rows if row['code'] not in existing_codes]
+        if new_rows:
+            db.session.execute(insert(Brand), new_rows)
+
+        # A spelling whose code is already taken joins that brand
+        by_code = dict(db.session.query(Brand.code, Brand.id).filter(Brand.code.in_(codes)))
+        found = {
+            key: by_code[name[:DISCOVERED_CODE_LENGTH]]
+            for key, name in missing.items() if name[:DISCOVERED_CODE_LENGTH] in by_code
+        }
+        add_aliases(found)
+        ids.update(found)
+
+    return {name: ids[key] for name, key in keys.items() if key in ids}
+
+
+def add_product_counts(new_products):
+    """
+    Increment product_count in place: `new_products` maps brand id to the
+    number of its products that were not stored before (negative for
+    products whose last items were deleted). Runs in the caller's
+    transaction.
+    """
+    increments = [
+        {'brand_id': brand_id, 'added': added}
+        for brand_id, added in new_products.items() if added
+    ]
+    if increments:
+        table = Brand.__table__
+        db.session.execute(
+            update(table)
+            .where(table.c.id == bindparam('brand_id'))
+            .values(product_count=func.coalesce(table.c.product_count, 0) + bindparam('added')),
+            increments
+        )
+
+
 def update_brand(brand_id, code, product_count, name):
     brand = Brand.query.get(brand_id)
     if brand:
         brand.code = code
         brand.product_count = product_count
         brand.name = name
+        add_aliases({brand_key(name): brand.id})
         db.session.commit()
         return True
     return False
@@ -42,6 +233,11 @@ def update_brand(brand_id, code, product_count, name):
 def delete_brand(brand_id):
     brand = Brand.query.get(brand_id)
     if brand:
+        # Items go back to unresolved; `flask sync-brands` re-resolves them
+        ContractItem.query.filter_by(brand_id=brand_id).update(
+            {'brand_id': None}, synchronize_session=False
+        )
+        rollup_repository.delete_brand(brand_id)
         db.session.delete(brand)
         db.session.commit()
         return True
@@ -0,0 +1,94 @@
+from itertools import islice
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from ..extensions import db
+
+
+def chunked(iterable, size):
+    """Yield lists of at most `size` elements from any iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def supports_upsert():
+    return db.session.get_bind().dialect.name in ("sqlite", "postgresql", "mysql", "mariadb")
+
+
+def upsert_rows(model, rows, index_elements, update_columns=None):
+    """
+    Insert `rows` (list of dicts) into `model`'s table with the dialect's
+    native upsert: INSERT ... ON CONFLICT on SQLite/Postgres and
+    INSERT ... ON DUPLICATE KEY UPDATE on MySQL. Conflicting rows get
+    `update_columns` overwritten, or are skipped when none are given.
+    The caller owns the transaction.
+    """
+    if not rows:
+        return
+
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ("mysql", "mariadb"):
+        stmt = mysql_insert(table)
+        if update_columns:
+            stmt = stmt.on_duplicate_key_update(
+                {c: stmt.inserted[c] for c in update_columns}
+            )
+        else:
+            stmt = stmt.prefix_with("IGNORE")
+    else:
+        if dialect == "sqlite":
+            stmt = sqlite_insert(table)
+        elif dialect == "postgresql":
+            stmt = postgresql_insert(table)
+        else:
+            raise NotImplementedError(f"No native upsert for dialect {dialect!r}")
+
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={c: stmt.excluded[c] for c in update_columns}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+    db.session.execute(stmt, rows)
+
+
+
+def increment_rows(model, rows, index_elements, columns):
+    """
+    Insert `rows` (list of dicts) into `model`'s table with the dialect's
+    native upsert, adding each of `columns` to the stored value when the
+    key already exists. The caller owns the transaction.
+    """
+    if not rows:
+        return
+
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ("mysql", "mariadb"):
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            {c: table.c[c] + stmt.inserted[c] for c in columns}
+        )
+    else:
+        if dialect == "sqlite":
+            stmt = sqlite_insert(table)
+        elif dialect == "postgresql":
+            stmt = postgresql_insert(table)
+        else:
+            raise NotImplementedError(f"No native upsert for dialect {dialect!r}")
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={c: table.c[c] + stmt.excluded[c] for c in columns}
+        )
+
+    db.session.execute(stmt, rows)
@@ -1,5 +1,8 @@
+from flask import current_app
+from sqlalchemy import insert, update
 from ..extensions import db
 from ..models.category import Category
+from .bulk import chunked
 
 def get_all_categories():
     return Category.query.order_by(Category.id).all()
@@ -12,6 +15,54 @@ def add_category(value, text):
     db.session.commit()
     return True
 
+def bulk_import_categories(rows, update_existing=False, batch_size=None):
+    """
+    Bulk add_category for an iterable of {'value', 'text'} dicts. Existing
+    values are loaded with one query; new categories are inserted with
+    executemany in chunks of `batch_size`, one commit each. Rows whose value
+    already exists are skipped, or have their text updated with
+    `update_existing`. Returns (inserted, updated, skipped).
+    """
+    if batch_size is None:
+        batch_size = current_app.config.get("INGEST_BATCH_SIZE", 500)
+
+    existing = {
+        value: (category_id, text)
+        for category_id, value, text in db.session.query(Category.id, Category.value, Category.text)
+    }
+
+    new_rows = {}
+    changed = {}
+    skipped = 0
+    for row in rows:
+        value, text = row['value'], row['text']
+        if value is None or text is None:
+            skipped += 1
+            continue
+
+        # Values read from a sheet can be numbers; the columns hold text
+        value, text = str(value).strip(), str(text)
+        if value in existing:
+            category_id, old_text = existing[value]
+            if update_existing and old_text != text:
+                changed[category_id] = {'id': category_id, 'text': text}
+            else:
+                skipped += 1
+        elif value in new_rows:
+            skipped += 1  # first row of a repeated value wins, as with add_category
+        else:
+            new_rows[value] = {'value': value, 'text': text}
+
+    for chunk in chunked(new_rows.values(), batch_size):
+        db.session.execute(insert(Category), chunk)
+        db.session.commit()
+
+    for chunk in chunked(changed.values(), batch_size):
+        db.session.execute(update(Category), chunk)
+        db.session.commit()
+
+    return len(new_rows), len(changed), skipped
+
 def update_category(category_id, value, text):
     category = Category.query.get(category_id)
     if category:
@@ -1,5 +1,16 @@
+from flask import current_app
+from sqlalchemy import insert
 from ..extensions import db
-from ..models.contract import Contract
+from ..models.contract import Contract, ContractItem, contract_date_keys
+from . import brand_repository, rollup_repository
+from .bulk import chunked, supports_upsert, upsert_rows
+from .keyset import clear_counts, keyset_paginate
+from .search import apply_text_filters
+from .normalize import (
+    blank_to_none_column, to_code_column, to_datetime_column, to_float_column,
+    to_number_column, to_str_column
+)
+from datetime import datetime
 import pandas as pd
 
 def parse_value(value, target_type=str):
@@ -12,11 +23,16 @@ def parse_value(value, target_type=str):
             return None
         return str(value)
     if target_type == float:
+        if isinstance(value, float):
+            return value
         try:
             return float(value)
         except:
             return None
     if target_type == 'datetime':
+        # Already parsed column-wise by normalize_contracts
+        if isinstance(value, datetime):
+            return None if pd.isna(value) else pd.Timestamp(value).to_pydatetime()
         try:
             # dt = pd.to_datetime(value, errors='coerce')
             dt = pd.to_datetime(value, dayfirst=True, errors='coerce')
@@ -28,26 +44,30 @@ def parse_value(value, target_type=str):
             return None
     return value
 
+# Length of contract_items.dedupe_key
+DEDUPE_KEY_LENGTH = 255
+
+
+def _clean_key(value):
+    if isinstance(value, str):
+        return value.strip().lower()
+    elif value is None or (isinstance(value, float) and pd.isna(value)):
+        return ''
+    else:
+        return str(value).strip().lower()
+
+
+def item_dedupe_key(item):
+    # Use service_key if present, else product_key as uniqueness key
+    unique_key = _clean_key(item.get('service')) or _clean_key(item.get('product'))
+    return unique_key[:DEDUPE_KEY_LENGTH]
+
+
 def get_unique_items(items):
     seen = set()
     unique_items = []
     for item in items:
-        raw_service = item.get('service')
-        raw_product = item.get('product')
-
-        def clean_key(value):
-            if isinstance(value, str):
-                return value.strip().lower()
-            elif value is None or (isinstance(value, float) and pd.isna(value)):
-                return ''
-            else:
-                return str(value).strip().lower()
-
-        service_key = clean_key(raw_service)
-        product_key = clean_key(raw_product)
-
-        # Use service_key if present, else product_key as uniqueness key
-        unique_key = service_key or product_key
+        unique_key = item_dedupe_key(item)
 
         if unique_key and unique_key not in seen:
             seen.add(unique_key)
@@ -55,8 +75,99 @@ def get_unique_items(items):
 
     return unique_items
 
-def get_contracts_filtered_paginated(filters, page=1, per_page=50):
+CONTRACT_FIELDS = [
+    'contract_id', 'status', 'organization_type', 'ministry',
+    'department', 'organization_name', 'office_zone', 'location',
+    'buyer_designation', 'buying_mode', 'bid_number',
+    'contract_date', 'total'
+]
+
+ITEM_FIELDS = [
+    'service', 'category_name', 'product',
+    'brand', 'model', 'hsn_code',
+    'ordered_quantity', 'price'
+]
+
+
+ITEM_NUMERIC_FIELDS = ['ordered_quantity', 'price']
+
+
+def normalize_contracts(df):
+    """
+    Coerce a frame of contract rows column by column: contract_date with one
+    dayfirst to_datetime, total/price/ordered_quantity with to_numeric,
+    hsn_code and the text header fields to str, with blanks turned into None.
+    """
+    df = df.copy()
+    for field in CONTRACT_FIELDS + ITEM_FIELDS:
+        if field not in df.columns:
+            df[field] = None
+        elif field == 'contract_date':
+            df[field] = to_datetime_column(df[field], dayfirst=True)
+        elif field == 'total':
+            df[field] = to_float_column(df[field])
+        elif field in ITEM_NUMERIC_FIELDS:
+            df[field] = to_number_column(df[field])
+        elif field == 'hsn_code':
+            df[field] = to_code_column(df[field])
+        elif field in CONTRACT_FIELDS:
+            df[field] = to_str_column(df[field])
+        else:
+            df[field] = blank_to_none_column(df[field])
+    return df
+
+
+def _clean_key_column(series):
+    # Column-wise equivalent of _clean_key
+    return (
+        series.astype(object)
+        .where(series.notna(), "")
+        .astype(str)
+        .str.strip()
+        .str.lower()
+    )
+
+
+def drop_duplicate_items(df):
+    """
+    Vectorized get_unique_items over a whole frame of contract rows: keeps
+    the first row per (contract_id, item_dedupe_key). One row with an empty
+    key is kept per contract, so a contract without items still has its
+    header row to group; add_contracts leaves that item out.
+    """
+    service_key = _clean_key_column(df['service'])
+    product_key = _clean_key_column(df['product'])
+    unique_key = service_key.where(service_key != "", product_key).str[:DEDUPE_KEY_LENGTH]
+
+    keyed = df.assign(_unique_key=unique_key)
+    keyed = keyed.drop_duplicates(subset=['contract_id', '_unique_key'])
+    return keyed.drop(columns='_unique_key')
+
+
+def group_contracts(df):
+    """
+    Group a normalized frame of contract rows into contract dicts with an
+    `items` list, in order of first appearance. Header fields come from the
+    first row of each contract.
+    """
+    df = df[df['contract_id'].notna()]
+
+    contracts = {}
+    heads = df.drop_duplicates(subset='contract_id')[CONTRACT_FIELDS]
+    for data in heads.to_dict("records"):
+        data['items'] = []
+        contracts[data['contract_id']] = data
+
+    contract_ids = df['contract_id'].tolist()
+    for cid, item in zip(contract_ids, df[ITEM_FIELDS].to_dict("records")):
+        contracts[cid]['items'].append(item)
+
+    return list(contracts.values())
+
+
+def get_contracts_filtered_paginated(filters, cursor=None, per_page=50):
     query = Contract.query
+    text_filters = {}
     for field in ['status', 'organization_type', 'ministry', 'department', 'organization_name',
                   'office_zone', 'location', 'buyer_designation', 'buying_mode', 'bid_number',
                   'contract_date', 'total', 'contract_id']:
@@ -66,25 +177,18 @@ def get_contracts_filtered_paginated(filters, page=1, per_page=50):
             if field in ['contract_date', 'total']:
                 query = query.filter(col == val)
             else:
-                query = query.filter(col.ilike(f"%{val}%"))
-    return query.order_by(Contract.contract_date.desc()).paginate(page=page, per_page=per_page)
-
+                text_filters[field] = val
+    query = apply_text_filters(query, Contract, text_filters)
+    return keyset_paginate(
+        query, Contract.contract_date, Contract.id, cursor, per_page,
+        count_key=tuple(sorted(filters.items())),
+    )
 
 
-def add_contract(contract_data):
-    contract_id = parse_value(contract_data.get('contract_id'), str)
-    contract = Contract.query.filter_by(contract_id=contract_id).first()
-    items = contract_data.get('items', [])
-    unique_items = get_unique_items(items)
-
-    if contract:
-        existing_items = contract.items or []
-        contract.items = get_unique_items(existing_items + unique_items)
-        db.session.commit()
-        return True
 
-    contract = Contract(
-        contract_id=contract_id,
+def _contract_values(contract_data):
+    contract_date = parse_value(contract_data.get('contract_date'), 'datetime')
+    return dict(
         status=parse_value(contract_data.get('status'), str),
         organization_type=parse_value(contract_data.get('organization_type'), str),
         ministry=parse_value(contract_data.get('ministry'), str),
@@ -95,19 +199,241 @@ def add_contract(contract_data):
         buyer_designation=parse_value(contract_data.get('buyer_designation'), str),
         buying_mode=parse_value(contract_data.get('buying_mode'), str),
         bid_number=parse_value(contract_data.get('bid_number'), str),
-        contract_date=parse_value(contract_data.get('contract_date'), 'datetime'),
+        contract_date=contract_date,
         total=parse_value(contract_data.get('total'), float),
-        items=unique_items
+        **contract_date_keys(contract_date),
+    )
+
+
+def _item_values(item):
+    brand = parse_value(item.get('brand'), str)
+    return dict(
+        service=parse_value(item.get('service'), str),
+        category_name=parse_value(item.get('category_name'), str),
+        product=parse_value(item.get('product'), str),
+        # Brands are matched by name, so surrounding spaces are dropped
+        brand=brand.strip() if brand else None,
+        model=parse_value(item.get('model'), str),
+        hsn_code=parse_value(item.get('hsn_code'), str),
+        ordered_quantity=parse_value(item.get('ordered_quantity'), float),
+        price=parse_value(item.get('price'), float),
+    )
+
+
+def _contract_pks(contract_ids):
+    return dict(
+        db.session.query(Contract.contract_id, Contract.id)
+        .filter(Contract.contract_id.in_(contract_ids))
+    )
+
+
+def _append_items(rows):
+    """Insert item rows, skipping (contract, dedupe key) pairs already stored."""
+    if not rows:
+        return
+
+    if supports_upsert():
+        upsert_rows(ContractItem, rows, ['contract_id', 'dedupe_key'])
+        return
+
+    existing = set(
+        db.session.query(ContractItem.contract_id, ContractItem.dedupe_key)
+        .filter(ContractItem.contract_id.in_({row['contract_id'] for row in rows}))
     )
-    db.session.add(contract)
+    rows = [row for row in rows if (row['contract_id'], row['dedupe_key']) not in existing]
+    if rows:
+        db.session.execute(insert(ContractItem), rows)
+
+
+def _new_brand_products(rows):
+    """
+    {brand id: number of its products not stored in contract_items yet}
+    for the item rows about to be appended.
+    """
+    pairs = {(row['brand_id'], row['product']) for row in rows if row['brand_id'] and row['product']}
+    if not pairs:
+        return {}
+
+    existing = {
+        tuple(pair) for pair in
+        db.session.query(ContractItem.brand_id, ContractItem.product)
+        .filter(
+            ContractItem.brand_id.in_({brand_id for brand_id, _ in pairs}),
+            ContractItem.product.in_({product for _, product in pairs}),
+        )
+        .distinct()
+    }
+
+    counts = {}
+    for brand_id, _ in pairs - existing:
+        counts[brand_id] = counts.get(brand_id, 0) + 1
+    return counts
+
+
+def _removed_brand_products(contract_pks):
+    """
+    {brand id: -number of its products left without items} once the items
+    of `contract_pks` are deleted, for add_product_counts.
+    """
+    pairs = {
+        tuple(pair) for pair in
+        db.session.query(ContractItem.brand_id, ContractItem.product)
+        .filter(
+            ContractItem.contract_id.in_(contract_pks),
+            ContractItem.brand_id.isnot(None),
+            ContractItem.product.isnot(None),
+            ContractItem.product != '',
+        )
+        .distinct()
+    }
+    if not pairs:
+        return {}
+
+    kept = {
+        tuple(pair) for pair in
+        db.session.query(ContractItem.brand_id, ContractItem.product)
+        .filter(
+            ContractItem.contract_id.notin_(contract_pks),
+            ContractItem.brand_id.in_({brand_id for brand_id, _ in pairs}),
+            ContractItem.product.in_({product for _, product in pairs}),
+        )
+        .distinct()
+    }
+
+    counts = {}
+    for brand_id, _ in pairs - kept:
+        counts[brand_id] = counts.get(brand_id, 0) - 1
+    return counts
+
+
+def _save_contracts(merged):
+    """
+    Write {contract_id: {'data', 'items'}} entries: new contracts get their
+    header inserted, existing headers are left as they are, and only items
+    whose dedupe key is new for the contract are appended. Item brands are
+    resolved to canonical brand ids (creating unknown brands) and their
+    product_count and the analytics rollups are kept up to date. The
+    caller commits.
+    """
+    pks = _contract_pks(list(merged))
+
+    new_rows = [
+        dict(contract_id=contract_id, **_contract_values(entry['data']))
+        for contract_id, entry in merged.items()
+        if contract_id not in pks
+    ]
+    new_headers = {}
+    if new_rows:
+        db.session.execute(insert(Contract), new_rows)
+        new_pks = _contract_pks([row['contract_id'] for row in new_rows])
+        pks.update(new_pks)
+        new_headers = {new_pks[row['contract_id']]: row for row in new_rows}
+
+    item_rows = [
+        dict(contract_id=pks[contract_id], dedupe_key=item_dedupe_key(item), **_item_values(item))
+        for contract_id, entry in merged.items()
+        for item in entry['items']
+    ]
+    brand_ids = brand_repository.resolve_brands(row['brand'] for row in item_rows if row['brand'])
+    for row in item_rows:
+        row['brand_id'] = brand_ids.get(row['brand'])
+
+    new_products = _new_brand_products(item_rows)
+    rollup_repository.record_batch(new_headers, item_rows)
+    _append_items(item_rows)
+    brand_repository.add_product_counts(new_products)
+
+
+def add_contract(contract_data):
+    contract_id = parse_value(contract_data.get('contract_id'), str)
+    items = get_unique_items(contract_data.get('items', []))
+
+    _save_contracts({contract_id: {'data': contract_data, 'items': items}})
     db.session.commit()
     return True
 
+
+def add_contracts(contracts, batch_size=None, on_error=None):
+    """
+    Batched add_contract: per chunk of `batch_size` contracts, existing ids
+    are resolved with a single IN query, new contracts are bulk inserted and
+    all items go in with one insert that skips already stored ones,
+    followed by one commit.
+
+    If a chunk fails to commit it is replayed contract by contract, so a
+    bad contract is reported through `on_error(contract_data, exc)` without
+    losing the rest of the chunk. Returns (written, failed).
+    """
+    if batch_size is None:
+        batch_size = current_app.config.get("INGEST_BATCH_SIZE", 500)
+
+    written = 0
+    failed = 0
+    for chunk in chunked(contracts, batch_size):
+        chunk_written, chunk_failed = _add_contract_chunk(chunk, on_error)
+        written += chunk_written
+        failed += chunk_failed
+    return written, failed
+
+
+def _add_contract_chunk(chunk, on_error):
+    failed = 0
+
+    # Contracts repeated inside the chunk are merged before touching the DB
+    merged = {}
+    for contract_data in chunk:
+        try:
+            contract_id = parse_value(contract_data.get('contract_id'), str)
+            if contract_id is None:
+                raise ValueError("contract_id is missing")
+            items = get_unique_items(contract_data.get('items') or [])
+        except Exception as e:
+            failed += 1
+            if on_error:
+                on_error(contract_data, e)
+            continue
+
+        if contract_id in merged:
+            entry = merged[contract_id]
+            entry['items'] = get_unique_items(entry['items'] + items)
+        else:
+            merged[contract_id] = {'data': contract_data, 'items': items}
+
+    if not merged:
+        return 0, failed
+
+    try:
+        _save_contracts(merged)
+        db.session.commit()
+        return len(merged), failed
+
+    except Exception:
+        db.session.rollback()
+
+    # Slow path: isolate the bad contract(s) of this chunk
+    written = 0
+    for entry in merged.values():
+        contract_data = dict(entry['data'], items=entry['items'])
+        try:
+            add_contract(contract_data)
+            written += 1
+        except Exception as e:
+            db.session.rollback()
+            failed += 1
+            if on_error:
+                on_error(contract_data, e)
+    return written, failed
+
 def bulk_delete(contract_ids):
     if not contract_ids:
         return 0
+    rollup_repository.subtract_contracts(contract_ids)
+    brand_repository.add_product_counts(_removed_brand_products(contract_ids))
+    # Not left to ON DELETE CASCADE: SQLite only enforces it with foreign_keys on
+    ContractItem.query.filter(ContractItem.contract_id.in_(contract_ids)).delete(synchronize_session=False)
     count = Contract.query.filter(Contract.id.in_(contract_ids)).delete(synchronize_session=False)
     db.session.commit()
+    clear_counts()
     return count
 
 
@@ -117,41 +443,40 @@ def bulk_delete(contract_ids):
 
 
 
+def filter_by_brand_ids(query, brand_ids):
+    """Keep contracts with an item of one of `brand_ids`, as a semi-join on contract_items."""
+    return query.filter(Contract.id.in_(
+        db.session.query(ContractItem.contract_id).filter(ContractItem.brand_id.in_(brand_ids))
+    ))
+
 def get_contracts_filtered_paginated_user(filters, page=1, per_page=50):
     query = Contract.query
 
     # Apply generic filters
-    for field in ['status', 'organization_type', 'ministry', 'department', 'organization_name',
-                  'office_zone', 'location', 'buyer_designation', 'buying_mode', 'bid_number',
-                  'contract_id']:
-        val = filters.get(field)
-        if val:
-            col = getattr(Contract, field)
-            query = query.filter(col.ilike(f"%{val}%"))
+    query = apply_text_filters(query, Contract, {
+        field: filters.get(field)
+        for field in ['status', 'organization_type', 'ministry', 'department', 'organization_name',
+                      'office_zone', 'location', 'buyer_designation', 'buying_mode', 'bid_number',
+                      'contract_id']
+    })
 
     # Filter by contract_date if precise date given
     contract_date = filters.get('contract_date')
     if contract_date:
         query = query.filter(Contract.contract_date == contract_date)
 
-    # Filter by category_names list (assumed Contract.items contains category_name)
+    # Filter by category_names list
     category_names = filters.get('category_names')
     if category_names:
         # Filter contracts having at least one item with category_name in list
         query = query.filter(
-            Contract.items.op('jsonb_path_exists')(
-                f"$[*] ? (@.category_name in {category_names})"
-            )
+            Contract.item_rows.any(ContractItem.category_name.in_(category_names))
         )
 
-    # Filter by brand_names list (assumed Contract.items contains brand)
+    # Filter by brand_names list
     brand_names = filters.get('brand_names')
     if brand_names:
-        query = query.filter(
-            Contract.items.op('jsonb_path_exists')(
-                f"$[*] ? (@.brand in {brand_names})"
-            )
-        )
+        query = filter_by_brand_ids(query, brand_repository.brand_ids_for_names(brand_names))
 
     return query.order_by(Contract.contract_date.desc()).paginate(page=page, per_page=per_page)
 
@@ -0,0 +1,154 @@
+import re
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, select, update
+from ..extensions import db
+from ..models.ingest import IngestCheckpoint, IngestProgress
+
+# Minimum seconds between two "running" progress writes for the same file
+PROGRESS_INTERVAL = 1.0
+# Progress rows untouched for this long are pruned when a worker goes idle
+PROGRESS_RETENTION = timedelta(days=30)
+
+# Uploaded files are spooled as "<job id>_<original name>"
+JOB_FILENAME = re.compile(r"^([0-9a-f]{32})_")
+
+# (worker, filename) -> [last write, last status, run start, rows at start]
+_progress_state = {}
+
+
+def new_job_filename(original):
+    job_id = uuid.uuid4().hex
+    return job_id, f"{job_id}_{original}"
+
+
+def job_id_from_filename(filename):
+    match = JOB_FILENAME.match(filename)
+    return match.group(1) if match else None
+
+
+def get_checkpoint(file_hash):
+    return IngestCheckpoint.query.filter_by(file_hash=file_hash).first()
+
+
+def save_checkpoint(file_hash, filename, rows_done, inserted, failed, status="running"):
+    checkpoint = get_checkpoint(file_hash)
+    if not checkpoint:
+        checkpoint = IngestCheckpoint(file_hash=file_hash)
+        db.session.add(checkpoint)
+
+    checkpoint.filename = filename
+    checkpoint.rows_done = rows_done
+    checkpoint.inserted = inserted
+    checkpoint.failed = failed
+    checkpoint.status = status
+    db.session.commit()
+    return checkpoint
+
+
+def update_progress(worker, filename, status, inserted=0, failed=0,
+                    rows_parsed=None, message=None):
+    """
+    Upsert the progress row of one file. Repeated "running" updates are
+    throttled to one write per PROGRESS_INTERVAL; status changes are always
+    written. Uses its own short transaction so it never commits (or waits
+    on) the caller's session.
+    """
+    key = (worker, filename)
+    now = time.monotonic()
+    state = _progress_state.get(key)
+
+    if state and status == state[1] == "running" and now - state[0] < PROGRESS_INTERVAL:
+        return
+
+    if not state or state[1] != "running":
+        state = [now, status, now, rows_parsed or 0]
+    state[0] = now
+    state[1] = status
+    if status == "running":
+        _progress_state[key] = state
+    else:
+        # Only running files are throttled; a queued or finished file starts
+        # over on its next update, so its state is dropped
+        _progress_state.pop(key, None)
+
+    values = dict(
+        status=status,
+        inserted=inserted,
+        failed=failed,
+        message=message[:255] if message else None,
+        updated_at=datetime.utcnow(),
+    )
+    if rows_parsed is not None:
+        values["rows_parsed"] = rows_parsed
+        elapsed = now - state[2]
+        values["rate"] = round((rows_parsed - state[3]) / elapsed, 1) if elapsed > 0 else None
+
+    table = IngestProgress.__table__
+    with db.engine.begin() as conn:
+        result = conn.execute(
+            update(table)
+            .where(table.c.worker == worker, table.c.filename == filename)
+            .values(**values)
+        )
+        if result.rowcount == 0:
+            values.setdefault("rows_parsed", 0)
+            conn.execute(insert(table).values(
+                worker=worker,
+                filename=filename,
+                job_id=job_id_from_filename(filename),
+                **values
+            ))
+
+
+def load_progress(worker, limit=200):
+    """Progress of the `limit` most recently updated files, keyed by filename."""
+    table = IngestProgress.__table__
+    with db.engine.connect() as conn:
+        rows = conn.execute(
+            select(table)
+            .where(table.c.worker == worker)
+            .order_by(table.c.updated_at.desc())
+            .limit(limit)
+        ).mappings().all()
+
+    return {row["filename"]: _progress_dict(row) for row in rows}
+
+
+def get_job(job_id):
+    """Progress of the file spooled under `job_id`, or None if unknown."""
+    table = IngestProgress.__table__
+    with db.engine.connect() as conn:
+        # The uploaded file's row comes first; later ones are quarantine replays
+        row = conn.execute(
+            select(table).where(table.c.job_id == job_id).order_by(table.c.id)
+        ).mappings().first()
+
+    if row is None:
+        return None
+
+    job = _progress_dict(row)
+    job.update(job_id=job_id, worker=row["worker"], filename=row["filename"])
+    return job
+
+
+def _progress_dict(row):
+    return {
+        "status": row["status"],
+        "inserted": row["inserted"],
+        "failed": row["failed"],
+        "rows_parsed": row["rows_parsed"],
+        "rate": row["rate"],
+        "message": row["message"],
+        "updated": row["updated_at"].strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def prune_progress(worker, retention=PROGRESS_RETENTION):
+    table = IngestProgress.__table__
+    cutoff = datetime.utcnow() - retention
+    with db.engine.begin() as conn:
+        conn.execute(
+            delete(table).where(table.c.worker == worker, table.c.updated_at < cutoff)
+        )
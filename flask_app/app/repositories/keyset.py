@@ -0,0 +1,178 @@
+"""
+Keyset (cursor) pagination for the admin lists.
+
+Rows are ordered newest first by a nullable DateTime column with the
+primary key as tie-breaker; NULL dates sort last on every backend. A page
+is fetched with a WHERE on the (date, id) of the row it continues from,
+so page 1000 costs the same as page 1. The position travels in signed,
+opaque next/prev tokens. Totals come from a short-TTL count cache instead
+of a COUNT(*) per click.
+"""
+import time
+from datetime import datetime
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import and_, func, or_
+
+from ..extensions import db
+
+# Seconds a list total is reused before it is counted again
+COUNT_TTL = 60
+# Most list totals kept (one per filter combination)
+COUNT_CACHE_SIZE = 1024
+
+# {key: (expires at, total)} in insertion order, which is expiry order
+_counts = {}
+
+
+class KeysetPage:
+    """One page of rows plus what the templates need to link around it."""
+
+    def __init__(self, items, page, per_page, total, next_token, prev_token):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.pages = max((total + per_page - 1) // per_page, 1)
+        self.next_token = next_token
+        self.prev_token = prev_token
+        self.has_next = next_token is not None
+        self.has_prev = prev_token is not None
+
+
+# ----------------- tokens -----------------
+
+def _serializer():
+    return URLSafeSerializer(current_app.config["SECRET_KEY"], salt="keyset-page")
+
+
+def _encode(direction, row, sort_col, id_col, page):
+    value = getattr(row, sort_col.key)
+    return _serializer().dumps({
+        "d": direction,
+        "v": value.isoformat() if value is not None else None,
+        "id": getattr(row, id_col.key),
+        "p": page,
+    })
+
+
+def _decode(token):
+    """(direction, date, id, page) of a token, or None for a missing or tampered one."""
+    if not token:
+        return None
+    try:
+        data = _serializer().loads(token)
+        value = datetime.fromisoformat(data["v"]) if data["v"] is not None else None
+        return data["d"], value, int(data["id"]), int(data["p"])
+    except (BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+# ----------------- ordering -----------------
+
+def _desc(column):
+    # SQLite and MySQL already put NULLs last in DESC order
+    if db.session.get_bind().dialect.name == "postgresql":
+        return column.desc().nulls_last()
+    return column.desc()
+
+
+def _asc(column):
+    if db.session.get_bind().dialect.name == "postgresql":
+        return column.asc().nulls_first()
+    return column.asc()
+
+
+def _after(sort_col, id_col, value, row_id):
+    """Rows after (value, row_id) in newest-first order."""
+    if value is None:
+        return and_(sort_col.is_(None), id_col < row_id)
+    return or_(
+        sort_col < value,
+        and_(sort_col == value, id_col < row_id),
+        sort_col.is_(None),
+    )
+
+
+def _before(sort_col, id_col, value, row_id):
+    """Rows before (value, row_id) in newest-first order."""
+    if value is None:
+        return or_(sort_col.isnot(None), and_(sort_col.is_(None), id_col > row_id))
+    return or_(sort_col > value, and_(sort_col == value, id_col > row_id))
+
+
+# ----------------- counting -----------------
+
+def cached_count(query, id_col, key, ttl=None):
+    """COUNT of `query`, reused for `ttl` seconds per `key` (e.g. the list's filters)."""
+    if ttl is None:
+        ttl = current_app.config.get("LIST_COUNT_TTL", COUNT_TTL)
+
+    now = time.monotonic()
+    hit = _counts.get(key)
+    if hit and hit[0] > now:
+        return hit[1]
+
+    total = query.order_by(None).with_entities(func.count(id_col)).scalar()
+    _counts.pop(key, None)
+    while _counts:
+        oldest = next(iter(_counts))
+        if _counts[oldest][0] > now and len(_counts) < COUNT_CACHE_SIZE:
+            break
+        del _counts[oldest]
+    _counts[key] = (now + ttl, total)
+    return total
+
+
+def clear_counts():
+    """Forget every cached total, after rows were added or deleted."""
+    _counts.clear()
+
+
+# ----------------- paging -----------------
+
+def keyset_paginate(query, sort_col, id_col, token=None, per_page=50, count_key=None):
+    """
+    Page of `query` newest first by (sort_col, id_col), continuing from
+    `token` (a next/prev token of an earlier page, or None for page 1).
+    `count_key` identifies the filtered list for the cached total.
+    """
+    total = cached_count(query, id_col, (id_col.class_.__tablename__, count_key))
+    position = _decode(token)
+
+    if position is None:
+        direction, page = "next", 1
+        rows = query.order_by(_desc(sort_col), id_col.desc()).limit(per_page + 1).all()
+    else:
+        direction, value, row_id, page = position
+        if direction == "next":
+            rows = (
+                query.filter(_after(sort_col, id_col, value, row_id))
+                .order_by(_desc(sort_col), id_col.desc())
+                .limit(per_page + 1)
+                .all()
+            )
+        else:
+            rows = (
+                query.filter(_before(sort_col, id_col, value, row_id))
+                .order_by(_asc(sort_col), id_col.asc())
+                .limit(per_page + 1)
+                .all()
+            )
+
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == "prev":
+        rows.reverse()
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = position is not None, more
+
+    next_token = prev_token = None
+    if rows and has_next:
+        next_token = _encode("next", rows[-1], sort_col, id_col, page + 1)
+    if rows and has_prev and page > 1:
+        prev_token = _encode("prev", rows[0], sort_col, id_col, page - 1)
+
+    return KeysetPage(rows, page, per_page, total, next_token, prev_token)
@@ -0,0 +1,63 @@
+import warnings
+import pandas as pd
+
+# Column-wise counterparts of parse_value: each call coerces a whole Series
+# at once so the repositories receive already-typed values.
+
+
+def to_datetime_column(series, dayfirst=False):
+    if dayfirst and not pd.api.types.is_datetime64_any_dtype(series):
+        # pandas applies dayfirst even to ISO strings ("2025-09-06" would
+        # become June 9th), so ISO-looking values are parsed year first
+        iso = series.astype(str).str.match(r"\d{4}-\d{2}-\d{2}")
+        if iso.any():
+            parsed = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+            parsed[iso] = to_datetime_column(series[iso])
+            parsed[~iso] = to_datetime_column(series[~iso], dayfirst=True)
+            return parsed
+
+    with warnings.catch_warnings():
+        # "Could not infer format" just means the slower per-value path
+        warnings.simplefilter("ignore", UserWarning)
+        parsed = pd.to_datetime(series, dayfirst=dayfirst, errors='coerce')
+    # Values that don't match the inferred format get a per-value retry,
+    # matching what parse_value(value, 'datetime') would return
+    retry = parsed.isna() & series.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(
+            series[retry], dayfirst=dayfirst, errors='coerce', format='mixed'
+        )
+    return parsed
+
+
+def to_float_column(series):
+    return pd.to_numeric(series, errors='coerce')
+
+
+def to_number_column(series):
+    """to_numeric that keeps integers as int where the column allows it, with None for blanks."""
+    parsed = pd.to_numeric(series, errors='coerce')
+    return parsed.astype(object).where(parsed.notna(), None)
+
+
+def to_str_column(series):
+    cleaned = series.astype(object).map(str, na_action='ignore')
+    blank = cleaned.str.strip() == ""
+    return cleaned.where(cleaned.notna() & ~blank, None)
+
+
+def to_code_column(series):
+    """to_str_column for numeric codes: whole floats (ints next to blanks) lose their ".0"."""
+    cleaned = to_str_column(series)
+    whole = series.map(
+        lambda v: isinstance(v, float) and v.is_integer(), na_action='ignore'
+    ).fillna(False).astype(bool)
+    cleaned[whole] = series[whole].map(lambda v: str(int(v)))
+    return cleaned
+
+
+def blank_to_none_column(series):
+    """Nulls and blank strings become None; other values keep their type."""
+    series = series.astype(object)
+    blank = series.map(lambda v: isinstance(v, str) and v.strip() == "")
+    return series.where(series.notna() & ~blank, None)
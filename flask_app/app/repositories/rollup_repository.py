@@ -0,0 +1,209 @@
+"""
+Monthly contract rollups for the analytics endpoints.
+
+contract_month_rollups holds, per (brand_id, month, status, buying_mode,
+ministry), the number of contracts, sum(total) and count(total). Rows
+under brand_id 0 cover all contracts. A row under a brand id covers the
+contracts with at least one item of that brand.
+
+The rows are adjusted in the same transaction that writes or deletes
+contracts: _save_contracts calls record_batch and bulk_delete calls
+subtract_contracts. Anything else that changes contracts or item brands
+(the sync-brands repair job, manual edits) calls rebuild, which is also
+`flask rebuild-rollups`.
+"""
+from sqlalchemy import and_, func, insert, literal, select, update
+
+from ..extensions import db
+from ..models.contract import Contract, ContractItem, ContractMonthRollup
+from .bulk import increment_rows, supports_upsert
+
+ALL_BRANDS = 0
+
+KEY_COLUMNS = ['brand_id', 'month', 'status', 'buying_mode', 'ministry']
+MEASURES = ['contract_count', 'total_sum', 'total_count']
+
+
+# ----------------- maintenance -----------------
+
+def _headers(contract_pks):
+    """{contract pk: header row} of the fields the rollups are keyed on."""
+    if not contract_pks:
+        return {}
+    rows = db.session.query(
+        Contract.id, Contract.contract_yyyymm, Contract.status,
+        Contract.buying_mode, Contract.ministry, Contract.total,
+    ).filter(Contract.id.in_(list(contract_pks)))
+    return {row.id: row._mapping for row in rows}
+
+
+def _deltas(headers, contract_pks, brand_pairs, sign=1):
+    """
+    Rollup rows adding (sign=1) or removing (sign=-1) the contracts
+    `contract_pks` under all brands and each (contract pk, brand id) of
+    `brand_pairs` under its brand.
+    """
+    deltas = {}
+
+    def add(header, brand_id):
+        key = (
+            brand_id, header['contract_yyyymm'] or 0, header['status'] or '',
+            header['buying_mode'] or '', header['ministry'] or '',
+        )
+        delta = deltas.setdefault(key, [0, 0.0, 0])
+        delta[0] += sign
+        if header['total'] is not None:
+            delta[1] += sign * header['total']
+            delta[2] += sign
+
+    for pk in contract_pks:
+        add(headers[pk], ALL_BRANDS)
+    for pk, brand_id in brand_pairs:
+        add(headers[pk], brand_id)
+
+    return [
+        dict(zip(KEY_COLUMNS, key), **dict(zip(MEASURES, delta)))
+        for key, delta in deltas.items()
+    ]
+
+
+def _apply(rows):
+    if not rows:
+        return
+
+    if supports_upsert():
+        increment_rows(ContractMonthRollup, rows, KEY_COLUMNS, MEASURES)
+        return
+
+    table = ContractMonthRollup.__table__
+    for row in rows:
+        updated = db.session.execute(
+            update(table)
+            .where(and_(*[table.c[c] == row[c] for c in KEY_COLUMNS]))
+            .values({c: table.c[c] + row[c] for c in MEASURES})
+        ).rowcount
+        if not updated:
+            db.session.execute(insert(table), row)
+
+
+def record_batch(new_headers, item_rows):
+    """
+    Count a write batch into the rollups before its items are appended:
+    `new_headers` is {contract pk: header values} of the contracts just
+    inserted, `item_rows` the item rows (with contract_id, dedupe_key and
+    brand_id) about to be appended. Existing contracts are only counted
+    under the brands their really new items add. The caller commits.
+    """
+    existing_pks = {row['contract_id'] for row in item_rows} - new_headers.keys()
+    stored_keys = set()
+    stored_pairs = set()
+    if existing_pks:
+        for pk, dedupe_key, brand_id in db.session.query(
+            ContractItem.contract_id, ContractItem.dedupe_key, ContractItem.brand_id
+        ).filter(ContractItem.contract_id.in_(existing_pks)):
+            stored_keys.add((pk, dedupe_key))
+            stored_pairs.add((pk, brand_id))
+
+    # Items with a stored dedupe key are skipped by the append
+    pairs = {
+        (row['contract_id'], row['brand_id']) for row in item_rows
+        if row['brand_id'] and (row['contract_id'], row['dedupe_key']) not in stored_keys
+    } - stored_pairs
+
+    headers = dict(new_headers)
+    headers.update(_headers({pk for pk, _ in pairs} - headers.keys()))
+    _apply(_deltas(headers, new_headers.keys(), pairs))
+
+
+def subtract_contracts(contract_pks):
+    """Take contracts about to be deleted out of the rollups. The caller commits."""
+    headers = _headers(contract_pks)
+    pairs = (
+        db.session.query(ContractItem.contract_id, ContractItem.brand_id)
+        .filter(ContractItem.contract_id.in_(list(contract_pks)), ContractItem.brand_id.isnot(None))
+        .distinct()
+    )
+    _apply(_deltas(headers, headers.keys(), [tuple(pair) for pair in pairs], sign=-1))
+    ContractMonthRollup.query.filter(ContractMonthRollup.contract_count <= 0).delete(
+        synchronize_session=False
+    )
+
+
+def delete_brand(brand_id):
+    """Drop the rows of a brand whose items were unlinked. The caller commits."""
+    ContractMonthRollup.query.filter_by(brand_id=brand_id).delete(synchronize_session=False)
+
+
+def rebuild():
+    """Recompute every rollup row from contracts and contract_items. Returns the row count."""
+    table = ContractMonthRollup.__table__
+    db.session.execute(table.delete())
+
+    keys = [
+        func.coalesce(Contract.contract_yyyymm, 0),
+        func.coalesce(Contract.status, ''),
+        func.coalesce(Contract.buying_mode, ''),
+        func.coalesce(Contract.ministry, ''),
+    ]
+    measures = [
+        func.count(Contract.id),
+        func.coalesce(func.sum(Contract.total), 0),
+        func.count(Contract.total),
+    ]
+
+    all_brands = select(literal(ALL_BRANDS), *keys, *measures).group_by(*keys)
+    db.session.execute(table.insert().from_select(KEY_COLUMNS + MEASURES, all_brands))
+
+    pairs = (
+        select(ContractItem.contract_id, ContractItem.brand_id)
+        .where(ContractItem.brand_id.isnot(None))
+        .distinct()
+        .subquery()
+    )
+    by_brand = (
+        select(pairs.c.brand_id, *keys, *measures)
+        .select_from(Contract.__table__.join(pairs, pairs.c.contract_id == Contract.id))
+        .group_by(pairs.c.brand_id, *keys)
+    )
+    db.session.execute(table.insert().from_select(KEY_COLUMNS + MEASURES, by_brand))
+
+    db.session.commit()
+    return db.session.query(func.count(ContractMonthRollup.id)).scalar()
+
+
+# ----------------- reading -----------------
+
+def grouped_totals(dimension, brand_id=ALL_BRANDS, status=None, buying_mode=None,
+                   ministry=None, first_month=None, last_month=None):
+    """
+    {value of `dimension`: [contracts, sum(total), count(total)]} over the
+    rows of one brand, optionally restricted to an inclusive month range
+    (which also leaves out undated contracts). '' and month 0 come back as
+    None, like the NULLs they stand for. `ministry` is a substring match.
+    """
+    rollup = ContractMonthRollup
+    column = getattr(rollup, dimension)
+    query = db.session.query(
+        column,
+        func.sum(rollup.contract_count),
+        func.sum(rollup.total_sum),
+        func.sum(rollup.total_count),
+    ).filter(rollup.brand_id == brand_id)
+
+    if status:
+        query = query.filter(rollup.status == status)
+    if buying_mode:
+        query = query.filter(rollup.buying_mode == buying_mode)
+    if ministry:
+        query = query.filter(rollup.ministry.ilike(f"%{ministry}%"))
+    if first_month is not None or last_month is not None:
+        query = query.filter(rollup.month > 0)
+    if first_month is not None:
+        query = query.filter(rollup.month >= first_month)
+    if last_month is not None:
+        query = query.filter(rollup.month <= last_month)
+
+    return {
+        key if key not in ('', 0) else None: [count, total_sum, total_count]
+        for key, count, total_sum, total_count in query.group_by(column)
+    }
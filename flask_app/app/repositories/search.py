@@ -0,0 +1,129 @@
+"""
+Substring search index for the free-text list filters.
+
+The filters keep their `ilike('%value%')` meaning; this module only makes
+them indexable:
+
+- SQLite: an external-content FTS5 table per searched table (trigram
+  tokenizer, so MATCH finds substrings case-insensitively), kept in sync
+  by triggers on every insert/update/delete, including the bulk ingest
+  upserts. Terms shorter than a trigram fall back to ilike.
+- Postgres: pg_trgm GIN indexes on the same columns, which serve the
+  plain ilike filters directly.
+- Other backends (MySQL) keep the unindexed ilike.
+
+create_all builds the index through after_create hooks; existing
+databases get it from the migration.
+"""
+from sqlalchemy import DDL, event, literal_column, select, text
+
+from ..extensions import db
+from ..models.contract import Contract
+from ..models.seller import Seller
+
+CONTRACT_SEARCH_COLUMNS = (
+    "ministry", "department", "organization_name",
+    "location", "buyer_designation", "bid_number",
+)
+SELLER_SEARCH_COLUMNS = ("company_name", "gstin", "email")
+
+SEARCH_COLUMNS = {
+    Contract: CONTRACT_SEARCH_COLUMNS,
+    Seller: SELLER_SEARCH_COLUMNS,
+}
+
+# The trigram tokenizer cannot match terms shorter than this
+MIN_TERM_LENGTH = 3
+
+# (database url, fts table) -> whether the FTS table exists
+_available = {}
+
+
+# ----------------- DDL -----------------
+
+def _fts_table(table):
+    return f"{table}_fts"
+
+
+def sqlite_ddl(table, columns):
+    """Statements creating and filling the FTS5 index of `table`."""
+    fts = _fts_table(table)
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def postgresql_ddl(table, columns):
+    """Statements creating the pg_trgm GIN indexes of `table`."""
+    return ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + [
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_{c}_trgm ON {table} USING gin ({c} gin_trgm_ops)"
+        for c in columns
+    ]
+
+
+for _model, _columns in SEARCH_COLUMNS.items():
+    _table = _model.__tablename__
+    for _statement in sqlite_ddl(_table, _columns):
+        event.listen(_model.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+    for _statement in postgresql_ddl(_table, _columns):
+        event.listen(_model.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+
+# ----------------- filtering -----------------
+
+def _has_fts(table):
+    bind = db.session.get_bind()
+    key = (str(bind.url), _fts_table(table))
+    if key not in _available:
+        _available[key] = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": _fts_table(table)},
+        ).first() is not None
+    return _available[key]
+
+
+def _phrase(value):
+    return '"' + value.replace('"', '""') + '"'
+
+
+def apply_text_filters(query, model, filters):
+    """
+    Filter `query` by `column ilike '%value%'` for each {column: value}.
+    Searched columns of terms long enough go through the FTS index on
+    SQLite, all in one MATCH; everything else stays a plain ilike.
+    """
+    indexed = SEARCH_COLUMNS.get(model, ())
+    table = model.__tablename__
+    use_fts = db.session.get_bind().dialect.name == "sqlite" and indexed and _has_fts(table)
+
+    terms = []
+    for field, value in filters.items():
+        if not value:
+            continue
+        column = getattr(model, field)
+        if use_fts and field in indexed and len(value) >= MIN_TERM_LENGTH:
+            terms.append(f"{field} : {_phrase(value)}")
+        else:
+            query = query.filter(column.ilike(f"%{value}%"))
+
+    if terms:
+        fts = _fts_table(table)
+        matches = (
+            select(literal_column("rowid"))
+            .select_from(text(fts))
+            .where(literal_column(fts).op("MATCH")(" AND ".join(terms)))
+        )
+        query = query.filter(model.id.in_(matches))
+    return query
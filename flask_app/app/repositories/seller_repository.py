@@ -1,7 +1,19 @@
+from flask import current_app
 from ..extensions import db
 from ..models.seller import Seller
+from .bulk import chunked, supports_upsert, upsert_rows
+from .keyset import clear_counts, keyset_paginate
+from .search import apply_text_filters
+from .normalize import to_datetime_column, to_str_column
+from datetime import datetime
 import pandas as pd
 
+SELLER_FIELDS = [
+    "contract_no", "generated_date", "category_name",
+    "seller_id", "company_name", "contact_no",
+    "email", "address", "msme_reg_no", "gstin"
+]
+
 def parse_value(value, target_type=str):
     if value is None:
         return None
@@ -12,6 +24,9 @@ def parse_value(value, target_type=str):
             return None
         return str(value)
     if target_type == 'datetime':
+        # Already parsed column-wise by normalize_sellers
+        if isinstance(value, datetime):
+            return None if pd.isna(value) else pd.Timestamp(value).to_pydatetime()
         try:
             dt = pd.to_datetime(value, errors='coerce')
             if pd.isna(dt):
@@ -21,16 +36,17 @@ def parse_value(value, target_type=str):
             return None
     return value
 
-def get_sellers_filtered_paginated(filters, page=1, per_page=10):
-    query = Seller.query
-    for field in ['contract_no', 'category_name', 'seller_id', 'company_name', 'contact_no', 'email', 'msme_reg_no', 'gstin']:
-        val = filters.get(field)
-        if val:
-            col = getattr(Seller, field)
-            query = query.filter(col.ilike(f"%{val}%"))
+def get_sellers_filtered_paginated(filters, cursor=None, per_page=10):
+    query = apply_text_filters(Seller.query, Seller, {
+        field: filters.get(field)
+        for field in ['contract_no', 'category_name', 'seller_id', 'company_name', 'contact_no', 'email', 'msme_reg_no', 'gstin']
+    })
     if filters.get('generated_date'):
         query = query.filter(Seller.generated_date == filters['generated_date'])
-    return query.order_by(Seller.generated_date.desc()).paginate(page=page, per_page=per_page)
+    return keyset_paginate(
+        query, Seller.generated_date, Seller.id, cursor, per_page,
+        count_key=tuple(sorted(filters.items())),
+    )
 
 def add_or_update_seller(data):
     contract_no = parse_value(data.get('contract_no'), str)
@@ -56,9 +72,74 @@ def add_or_update_seller(data):
     db.session.commit()
     return True
 
+def normalize_sellers(df):
+    """
+    Column-wise parse_value over a seller frame: generated_date is parsed
+    with one to_datetime call and the other columns are cleaned to
+    str/None, so no per-row parsing is left for the write stage.
+    """
+    out = pd.DataFrame(index=df.index)
+    for field in SELLER_FIELDS:
+        column = df[field] if field in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if field == "generated_date":
+            out[field] = to_datetime_column(column)
+        else:
+            out[field] = to_str_column(column)
+    return out
+
+
+def drop_duplicate_sellers(df):
+    """
+    Keep the last row per contract_no, as with sequential
+    add_or_update_seller calls. Rows without a contract_no are kept so the
+    write stage can count them as failed.
+    """
+    keep = df["contract_no"].isna() | ~df.duplicated(subset="contract_no", keep="last")
+    return df[keep]
+
+
+def upsert_sellers(df, batch_size=None):
+    """
+    Bulk add_or_update_seller for a frame from normalize_sellers (and
+    drop_duplicate_sellers), upserting on contract_no in chunks with the
+    dialect's native ON CONFLICT DO UPDATE. A chunk that fails is replayed
+    row by row. Returns (written, failed).
+    """
+    if batch_size is None:
+        batch_size = current_app.config.get("INGEST_BATCH_SIZE", 500)
+
+    missing_key = df["contract_no"].isna()
+    failed = int(missing_key.sum())
+    df = df[~missing_key]
+    written = len(df)
+
+    rows = df.astype(object).where(df.notna(), None).to_dict("records")
+    update_columns = [f for f in SELLER_FIELDS if f != "contract_no"]
+
+    for chunk in chunked(rows, batch_size):
+        try:
+            if not supports_upsert():
+                raise NotImplementedError
+            upsert_rows(Seller, chunk, ["contract_no"], update_columns)
+            db.session.commit()
+            continue
+        except Exception:
+            db.session.rollback()
+
+        for row in chunk:
+            try:
+                add_or_update_seller(row)
+            except Exception:
+                db.session.rollback()
+                written -= 1
+                failed += 1
+
+    return written, failed
+
 def bulk_delete_sellers(ids):
     if not ids:
         return 0
     count = Seller.query.filter(Seller.id.in_(ids)).delete(synchronize_session=False)
     db.session.commit()
+    clear_counts()
     return count
@@ -1,48 +1,84 @@
+from sqlalchemy import bindparam, distinct, exists, func, update
+
 from ..extensions import db
-from ..models.contract import Contract
+from ..models.contract import ContractItem
 from ..models.brand import Brand
+from ..repositories import brand_repository, rollup_repository
+from ..repositories.bulk import chunked
+
+# Brands handled per round trip / commit
+SYNC_BATCH = 1000
 
 
-def normalize_brand(name: str) -> str:
-    return (
-        name.strip()
-        .upper()
-        .replace("™", "")
-        .replace("®", "")
+def _resolve_unlinked_items(batch_size):
+    """Give items without a brand_id (older rows, deleted brands) their canonical brand. Returns spellings seen."""
+    names = [
+        name for (name,) in
+        db.session.query(distinct(ContractItem.brand))
+        .filter(ContractItem.brand_id.is_(None), ContractItem.brand.isnot(None))
+        .all()
+    ]
+
+    table = ContractItem.__table__
+    link = (
+        update(table)
+        .where(table.c.brand == bindparam('raw'), table.c.brand_id.is_(None))
+        .values(brand_id=bindparam('resolved'))
     )
 
+    for batch in chunked(names, batch_size):
+        brand_ids = brand_repository.resolve_brands(batch)
+        if brand_ids:
+            db.session.execute(link, [
+                {'raw': name, 'resolved': brand_id} for name, brand_id in brand_ids.items()
+            ])
+        db.session.commit()
+
+    return len(names)
+
+
+def sync_brands_from_contracts(batch_size=SYNC_BATCH):
+    """
+    Repair job: link unresolved items to brands and recount product_count.
+
+    Ingestion and bulk deletes keep both current, so this is only needed
+    after brand deletes or manual edits. Counts are aggregated in SQL and
+    written in batches of `batch_size`, one commit each; brands without
+    items are set to 0. The analytics rollups are rebuilt as well, since
+    newly linked items change the per-brand rows. Returns (brands found,
+    brands inserted).
+    """
+    before = db.session.query(func.count(Brand.id)).scalar()
+    _resolve_unlinked_items(batch_size)
 
-def sync_brands_from_contracts():
-    # 1️⃣ Get existing brand names
-    existing = {
-        b.name.upper()
-        for b in db.session.query(Brand.name).all()
-    }
-
-    # 2️⃣ Extract brands from contracts JSON
-    found = set()
-
-    contracts = db.session.query(Contract.items).all()
-    for (items,) in contracts:
-        if not items:
-            continue
-        for item in items:
-            if isinstance(item, dict):
-                brand = item.get("brand")
-                if brand:
-                    found.add(normalize_brand(brand))
-
-    # 3️⃣ Insert only new brands
-    inserted = 0
-    for brand_name in found - existing:
-        db.session.add(
-            Brand(
-                code=brand_name[:200],   # auto code
-                name=brand_name,
-                product_count=0
-            )
-        )
-        inserted += 1
+    rows = (
+        db.session.query(ContractItem.brand_id, func.count(distinct(ContractItem.product)))
+        .filter(ContractItem.brand_id.isnot(None))
+        .group_by(ContractItem.brand_id)
+        .all()
+    )
+
+    table = Brand.__table__
+    set_count = (
+        update(table)
+        .where(table.c.id == bindparam('brand_id'))
+        .values(product_count=bindparam('count'))
+    )
 
+    db.session.execute(
+        update(table)
+        .where(~exists().where(ContractItem.brand_id == table.c.id))
+        .values(product_count=0)
+    )
     db.session.commit()
-    return len(found), inserted
+
+    for batch in chunked(rows, batch_size):
+        db.session.execute(set_count, [
+            {'brand_id': brand_id, 'count': count} for brand_id, count in batch
+        ])
+        db.session.commit()
+
+    rollup_repository.rebuild()
+
+    inserted = db.session.query(func.count(Brand.id)).scalar() - before
+    return len(rows), inserted
@@ -1,10 +1,17 @@
 import os
 import json
-import time
-import pandas as pd
+import queue
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from ..repositories import contract_repository
-from ..repositories.contract_repository import get_unique_items
+import pandas as pd
+from flask import current_app
+from . import file_lock
+from ..repositories import ingest_repository
+from ..repositories.keyset import clear_counts
+from .ingest_pipeline import CONTRACTS, RunStats, iter_batches, write_batch
+from .readers import INPUT_EXTENSIONS
 
 BASE_DIR = os.path.join(
     os.path.dirname(os.path.dirname(__file__)),
@@ -14,127 +21,363 @@ BASE_DIR = os.path.join(
 PENDING = os.path.join(BASE_DIR, "pending")
 FAILED = os.path.join(BASE_DIR, "failed")
 LOGS = os.path.join(BASE_DIR, "logs")
-PROGRESS_FILE = os.path.join(BASE_DIR, "progress.json")
 LOCK_FILE = os.path.join(BASE_DIR, ".lock")
 
-def ensure_progress_file():
-    if not os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, "w") as f:
-            json.dump({}, f)
+WORKER = "contracts"
+
+# Contracts that failed to write are kept as "<file>.quarantine.jsonl" in FAILED
+QUARANTINE_SUFFIX = ".quarantine.jsonl"
+
+
 def ensure_dirs():
     os.makedirs(PENDING, exist_ok=True)
     os.makedirs(FAILED, exist_ok=True)
     os.makedirs(LOGS, exist_ok=True)
 
 def mark_idle():
-    progress = load_progress()
-    progress["_system"] = {
-        "status": "idle",
-        "message": "No pending contract files",
-        "updated": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    save_progress(progress)
+    ingest_repository.update_progress(
+        WORKER, "_system", "idle", message="No pending contract files"
+    )
+    ingest_repository.prune_progress(WORKER)
 
 def load_progress():
-    if not os.path.exists(PROGRESS_FILE):
-        return {}
-    with open(PROGRESS_FILE) as f:
-        return json.load(f)
+    return ingest_repository.load_progress(WORKER)
 
 
-def save_progress(data):
-    with open(PROGRESS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+def update_file_status(filename, status, inserted=0, failed=0, rows_parsed=None, message=None):
+    ingest_repository.update_progress(
+        WORKER, filename, status, inserted, failed,
+        rows_parsed=rows_parsed, message=message
+    )
 
-from datetime import datetime
 
-def update_file_status(filename, status, inserted=0, failed=0):
-    progress = load_progress()
 
-    if filename not in progress:
-        progress[filename] = {}
 
-    progress[filename].update({
-        "status": status,
-        "inserted": inserted,
-        "failed": failed,
-        "updated": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-    })
+def is_locked():
+    return file_lock.is_held(LOCK_FILE)
 
-    save_progress(progress)
 
+def lock():
+    return file_lock.acquire(LOCK_FILE)
 
 
+def unlock():
+    file_lock.release(LOCK_FILE)
 
-def is_locked():
-    return os.path.exists(LOCK_FILE)
 
+# ----------------- quarantine -----------------
 
-def lock():
-    with open(LOCK_FILE, "w") as f:
-        f.write(str(os.getpid()))
+def quarantine_path(filename):
+    return os.path.join(FAILED, filename + QUARANTINE_SUFFIX)
 
 
-def unlock():
-    if os.path.exists(LOCK_FILE):
-        os.remove(LOCK_FILE)
+def _json_value(value):
+    # pd.Timestamp and NaT are datetimes too
+    if isinstance(value, datetime):
+        return None if pd.isna(value) else value.isoformat()
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    return str(value)
 
 
-def process_excel(filepath):
-    filename = os.path.basename(filepath)
+def quarantine(path, failures, mode="a"):
+    """
+    Write (contract_data, error) pairs to the quarantine file at `path`, one
+    JSON line per contract group holding its de-duplicated item rows.
+    """
+    if not failures:
+        return
+    with open(path, mode, encoding="utf-8") as f:
+        for contract_data, error in failures:
+            line = {
+                "contract_id": contract_data.get("contract_id"),
+                "error": str(error),
+                "contract": contract_data,
+            }
+            f.write(json.dumps(line, default=_json_value, ensure_ascii=False) + "\n")
+
+
+def load_quarantine(path):
+    contracts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            contract_data = json.loads(line)["contract"]
+            # Stored as ISO text, which a dayfirst parse would read as yyyy-dd-mm
+            if contract_data.get("contract_date"):
+                contract_data["contract_date"] = datetime.fromisoformat(contract_data["contract_date"])
+            contracts.append(contract_data)
+    return contracts
+
+
+def replay_quarantine(path):
+    """
+    Re-ingest only the contracts held in a quarantine file. The ones that
+    fail again are written back to it; once all went in it is removed.
+    """
+    filename = os.path.basename(path)
     update_file_status(filename, "running")
 
-    inserted = 0
-    failed = 0
-
+    stats = RunStats(CONTRACTS.name, filename)
+    failures = []
     try:
-        df = pd.read_excel(filepath, engine="openpyxl")
-        df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
-
-        contract_fields = [
-            'contract_id', 'status', 'organization_type', 'ministry',
-            'department', 'organization_name', 'office_zone', 'location',
-            'buyer_designation', 'buying_mode', 'bid_number',
-            'contract_date', 'total'
-        ]
-
-        item_fields = [
-            'service', 'category_name', 'product',
-            'brand', 'model', 'hsn_code',
-            'ordered_quantity', 'price'
-        ]
-
-        contract_map = {}
-
-        for _, row in df.iterrows():
-            cid = row['contract_id']
-            if cid not in contract_map:
-                contract_map[cid] = {f: row.get(f) for f in contract_fields}
-                contract_map[cid]['items'] = []
-
-            contract_map[cid]['items'].append(
-                {f: row.get(f) for f in item_fields}
-            )
-
-        for cid, data in contract_map.items():
-            try:
-                data['items'] = get_unique_items(data['items'])
-                if contract_repository.add_contract(data):
-                    inserted += 1
-            except Exception:
-                failed += 1
+        contracts = load_quarantine(path)
+        written, failed = write_batch(
+            CONTRACTS, contracts, stats, on_error=lambda c, e: failures.append((c, e))
+        )
+    except Exception as e:
+        update_file_status(filename, "failed", message=str(e))
+        stats.save(LOGS, "failed")
+        return
+    finally:
+        clear_counts()
+
+    if failures:
+        quarantine(path + ".part", failures, mode="w")
+        os.replace(path + ".part", path)
+        message = f"{failed} contracts still quarantined"
+    else:
+        os.remove(path)
+        message = None
+
+    update_file_status(filename, "completed", written, failed, len(contracts), message=message)
+    stats.save(LOGS, "completed")
+
+
+def file_sha256(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _open_run(filepath, file_hash):
+    """
+    Resolve the checkpoint of a file by content hash. Returns the run state
+    to resume from, or None if this exact content was already fully
+    ingested, in which case the file is dropped straight away.
+    """
+    filename = os.path.basename(filepath)
+    checkpoint = ingest_repository.get_checkpoint(file_hash)
 
-        update_file_status(filename, "completed", inserted, failed)
+    if checkpoint and checkpoint.status == "completed":
+        update_file_status(filename, "skipped", checkpoint.inserted, checkpoint.failed)
         os.remove(filepath)
+        return None
+
+    return {
+        "path": filepath,
+        "filename": filename,
+        "hash": file_hash,
+        "skip_rows": checkpoint.rows_done if checkpoint else 0,
+        "rows_parsed": checkpoint.rows_done if checkpoint else 0,
+        "inserted": checkpoint.inserted if checkpoint else 0,
+        "failed": checkpoint.failed if checkpoint else 0,
+        "stats": RunStats(CONTRACTS.name, filename),
+    }
+
+
+def _write_batch(run, rows_done, contracts):
+    failures = []
+    written, failed = write_batch(
+        CONTRACTS, contracts, run["stats"], on_error=lambda c, e: failures.append((c, e))
+    )
+    quarantine(quarantine_path(run["filename"]), failures)
+    run["inserted"] += written
+    run["failed"] += failed
+    run["rows_parsed"] = rows_done
+
+    # Saved after the batch commit: a crash in between replays one batch,
+    # which is harmless because merging items is idempotent
+    ingest_repository.save_checkpoint(
+        run["hash"], run["filename"], rows_done, run["inserted"], run["failed"]
+    )
+    update_file_status(
+        run["filename"], "running", run["inserted"], run["failed"], run["rows_parsed"]
+    )
+
+
+def _finish_run(run, ok, message=None):
+    clear_counts()
+    if ok:
+        ingest_repository.save_checkpoint(
+            run["hash"], run["filename"], 0, run["inserted"], run["failed"],
+            status="completed"
+        )
+        message = None
+        if run["failed"]:
+            message = f"{run['failed']} contracts quarantined for retry"
+        update_file_status(
+            run["filename"], "completed", run["inserted"], run["failed"], run["rows_parsed"],
+            message=message
+        )
+        run["stats"].save(LOGS, "completed")
+        os.remove(run["path"])
+    else:
+        update_file_status(
+            run["filename"], "failed", run["inserted"], run["failed"], run["rows_parsed"],
+            message=message
+        )
+        run["stats"].save(LOGS, "failed")
+        os.replace(run["path"], os.path.join(FAILED, run["filename"]))
+
+
+def _fail_file(filepath, message=None):
+    filename = os.path.basename(filepath)
+    update_file_status(filename, "failed", message=message)
+    os.replace(filepath, os.path.join(FAILED, filename))
+
+
+def process_excel(filepath):
+    try:
+        run = _open_run(filepath, file_sha256(filepath))
+    except Exception as e:
+        _fail_file(filepath, str(e))
+        return
+
+    if run is None:
+        return
 
-    except Exception:
-        update_file_status(filename, "failed", inserted, failed)
-        os.rename(filepath, os.path.join(FAILED, filename))
+    update_file_status(run["filename"], "running", run["inserted"], run["failed"])
+
+    try:
+        batches = iter_batches(CONTRACTS, filepath, run["stats"], skip_rows=run["skip_rows"])
+        for rows_done, contracts in batches:
+            _write_batch(run, rows_done, contracts)
+        _finish_run(run, ok=True)
+
+    except Exception as e:
+        _finish_run(run, ok=False, message=str(e))
+
+
+def _safe_sha256(filepath):
+    try:
+        return file_sha256(filepath)
+    except OSError:
+        return None
+
+
+def _parse_file(filepath, skip_rows, out_queue, cancelled):
+    """
+    Runs in a pool process: parse one file and hand its contract batches to
+    the writer through `out_queue`, followed by the parse stage stats.
+    Stops between batches once the writer puts the file in `cancelled`.
+    Never touches the database.
+    """
+    try:
+        out_queue.put(("start", filepath, None))
+        stats = RunStats(CONTRACTS.name, os.path.basename(filepath))
+        for batch in iter_batches(CONTRACTS, filepath, stats, skip_rows=skip_rows):
+            if filepath in cancelled:
+                return
+            out_queue.put(("batch", filepath, batch))
+        out_queue.put(("done", filepath, stats.stages))
+    except Exception as e:
+        out_queue.put(("error", filepath, str(e)))
+
+
+def process_files_parallel(filepaths, max_workers=None):
+    """
+    Parse `filepaths` concurrently in a process pool while this thread acts
+    as the single DB writer, consuming parsed batches from a bounded queue.
+    Checkpoints and progress are handled per file exactly as process_excel
+    does.
+    """
+    if not filepaths:
+        return
+
+    if max_workers is None:
+        max_workers = current_app.config.get("INGEST_WORKERS") or os.cpu_count() or 1
+    max_workers = min(max_workers, len(filepaths))
+
+    for path in filepaths:
+        update_file_status(os.path.basename(path), "queued")
+
+    with multiprocessing.Manager() as manager, \
+            ProcessPoolExecutor(max_workers=max_workers) as pool:
+
+        runs = {}
+        seen_hashes = set()
+        for path, file_hash in zip(filepaths, pool.map(_safe_sha256, filepaths)):
+            if file_hash is None:
+                _fail_file(path)
+            elif file_hash in seen_hashes:
+                # Same content twice in one drop: the first copy is ingested
+                # (or lands in failed/ for a retry), so the copy is dropped
+                # like an identical re-drop
+                update_file_status(
+                    os.path.basename(path), "skipped",
+                    message="Same content as another file in this run",
+                )
+                os.remove(path)
+            else:
+                seen_hashes.add(file_hash)
+                run = _open_run(path, file_hash)
+                if run:
+                    runs[path] = run
+
+        # Bounded so parsers can't run arbitrarily far ahead of the writer
+        out_queue = manager.Queue(maxsize=max_workers * 2)
+        # Files whose parser should stop: failed runs, or all on the way out
+        cancelled = manager.dict()
+        futures = {
+            pool.submit(_parse_file, path, run["skip_rows"], out_queue, cancelled): path
+            for path, run in runs.items()
+        }
+
+        def finish(path, ok, message=None):
+            if not ok:
+                cancelled[path] = True
+            _finish_run(runs.pop(path), ok, message)
+
+        try:
+            _consume(runs, futures, out_queue, finish)
+        finally:
+            # A parser blocked on the full queue would keep the pool from
+            # shutting down: stop them all and discard what they still send
+            for path in futures.values():
+                cancelled[path] = True
+            while not all(future.done() for future in futures):
+                try:
+                    out_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+
+def _consume(runs, futures, out_queue, finish):
+    """Write parsed batches from `out_queue` until every run has finished."""
+    while runs:
+        try:
+            kind, path, payload = out_queue.get(timeout=1)
+        except queue.Empty:
+            # A parser that died without reporting fails its file
+            for future, path in futures.items():
+                if path in runs and future.done() and future.exception():
+                    finish(path, ok=False, message=str(future.exception()))
+            continue
+
+        if path not in runs:
+            continue
+
+        run = runs[path]
+        if kind == "start":
+            update_file_status(run["filename"], "running", run["inserted"], run["failed"])
+        elif kind == "batch":
+            try:
+                _write_batch(run, *payload)
+            except Exception as e:
+                finish(path, ok=False, message=str(e))
+        elif kind == "done":
+            run["stats"].merge(payload)
+            finish(path, ok=True)
+        else:
+            finish(path, ok=False, message=payload)
 
 
 def process_next_pending():
     ensure_dirs()
-    ensure_progress_file()
 
     # 🔴 STOP if already running
     if is_locked():
@@ -142,7 +385,7 @@ def process_next_pending():
 
     files = [
         f for f in os.listdir(PENDING)
-        if f.endswith((".xls", ".xlsx"))
+        if f.endswith(INPUT_EXTENSIONS)
     ]
 
     # 🔴 STOP when pending is empty
@@ -151,7 +394,8 @@ def process_next_pending():
         print("NO PENDING FILES — PROCESS STOPPED")
         return "no_pending"
 
-    lock()
+    if not lock():
+        return "locked"
     try:
         process_excel(os.path.join(PENDING, files[0]))
         return "processed"
@@ -159,26 +403,56 @@ def process_next_pending():
         unlock()
 
 
+def process_all_pending(max_workers=None):
+    ensure_dirs()
+
+    if is_locked():
+        return "locked"
+
+    files = sorted(
+        f for f in os.listdir(PENDING)
+        if f.endswith(INPUT_EXTENSIONS)
+    )
+
+    if not files:
+        mark_idle()
+        return "no_pending"
+
+    if not lock():
+        return "locked"
+    try:
+        process_files_parallel([os.path.join(PENDING, f) for f in files], max_workers)
+        return "processed"
+    finally:
+        unlock()
+
+
 
 def retry_all_failed():
+    """
+    Re-run failed files (resuming from their checkpoint), then replay the
+    quarantined contracts only, including any the file runs just added.
+    """
     ensure_dirs()
     if is_locked():
         return
 
-    files = sorted(f for f in os.listdir(FAILED) if f.endswith(".xlsx"))
-    if not files:
+    files = sorted(f for f in os.listdir(FAILED) if f.endswith(INPUT_EXTENSIONS))
+    if not files and not any(f.endswith(QUARANTINE_SUFFIX) for f in os.listdir(FAILED)):
         return
 
-    lock()
+    if not lock():
+        return
     try:
-        for f in files:
-            process_excel(os.path.join(FAILED, f))
+        process_files_parallel([os.path.join(FAILED, f) for f in files])
+        for f in sorted(os.listdir(FAILED)):
+            if f.endswith(QUARANTINE_SUFFIX):
+                replay_quarantine(os.path.join(FAILED, f))
     finally:
         unlock()
 
 
 
-
 # import os
 # import json
 # import time
@@ -0,0 +1,84 @@
+"""
+Lock files that keep two ingestion runs (the ingest worker, an admin
+"process" button) off the same folders.
+
+The lock is created with O_CREAT | O_EXCL, so only one process can get it,
+and holds "<host>:<pid>" of the holder. A lock left behind by a process
+that no longer runs on this host is stale and is taken over.
+"""
+import os
+import socket
+import time
+
+# An empty lock file is a holder between creating and writing it, unless
+# it has been empty for this long (crashed right after creating it)
+EMPTY_GRACE_SECONDS = 10
+
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+def _is_stale(path):
+    try:
+        with open(path) as f:
+            owner = f.read().strip()
+        age = time.time() - os.path.getmtime(path)
+    except FileNotFoundError:
+        return False  # released meanwhile; the next create attempt decides
+
+    if not owner:
+        return age > EMPTY_GRACE_SECONDS
+
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        return False  # can't tell whether a process on another host runs
+    try:
+        return not _pid_running(int(pid))
+    except ValueError:
+        return True
+
+
+def acquire(path):
+    """Take the lock at `path`. False if a running process holds it."""
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            if not _is_stale(path):
+                return False
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+
+        with os.fdopen(fd, "w") as f:
+            f.write(_owner())
+        return True
+    return False
+
+
+def release(path):
+    """Remove the lock at `path` if this process holds it."""
+    try:
+        with open(path) as f:
+            if f.read().strip() != _owner():
+                return
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def is_held(path):
+    return os.path.exists(path) and not _is_stale(path)
@@ -0,0 +1,118 @@
+import os
+import signal
+import threading
+
+from flask import current_app
+
+from ..extensions import db
+from . import contract_excel_worker, master_data_worker, seller_excel_worker
+from .readers import INPUT_EXTENSIONS
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional: fall back to polling
+    FileSystemEventHandler = object
+    Observer = None
+
+POLL_INTERVAL = 5
+# Give uploads/FTP transfers a moment to finish writing before parsing
+SETTLE_SECONDS = 2
+
+
+class _WakeHandler(FileSystemEventHandler):
+    def __init__(self, wake):
+        self.wake = wake
+
+    def on_any_event(self, event):
+        if not event.is_directory:
+            self.wake.set()
+
+
+def _has_pending(folder):
+    if not os.path.isdir(folder):
+        return False
+    return any(f.endswith(INPUT_EXTENSIONS) for f in os.listdir(folder))
+
+
+def _process(run):
+    """
+    Call a worker's process function; True if it processed something. An
+    exception is logged and counted as no work, so one bad file doesn't
+    stop the daemon (it is retried after the next poll).
+    """
+    try:
+        return run() == "processed"
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Ingest run failed in %s", run.__module__)
+        return False
+
+
+def _drain(stop):
+    """Process pending files until all folders are empty or we're asked to stop."""
+    while not stop.is_set():
+        worked = False
+
+        if _has_pending(contract_excel_worker.PENDING):
+            worked |= _process(contract_excel_worker.process_all_pending)
+
+        if not stop.is_set() and _has_pending(seller_excel_worker.PENDING):
+            worked |= _process(seller_excel_worker.process_next_pending)
+
+        if not stop.is_set() and any(
+            _has_pending(folder) for folder in master_data_worker.PENDING.values()
+        ):
+            worked |= _process(master_data_worker.process_next_pending)
+
+        if not worked:
+            return
+
+
+def run_ingest_worker(poll_interval=POLL_INTERVAL, stop=None):
+    """
+    Watch the contract, seller and master data pending folders and ingest files as they
+    arrive, outside of the web process. Uses inotify (through watchdog) when
+    it is installed and polls every `poll_interval` seconds otherwise.
+    SIGTERM/SIGINT let the file in progress finish, then return.
+    Must run inside an app context.
+    """
+    stop = stop or threading.Event()
+    wake = threading.Event()
+
+    def request_stop(signum, frame):
+        stop.set()
+        wake.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    contract_excel_worker.ensure_dirs()
+    seller_excel_worker.ensure_dirs()
+    master_data_worker.ensure_dirs()
+
+    observer = None
+    if Observer is not None:
+        observer = Observer()
+        handler = _WakeHandler(wake)
+        folders = (
+            contract_excel_worker.PENDING,
+            seller_excel_worker.PENDING,
+            *master_data_worker.PENDING.values(),
+        )
+        for folder in folders:
+            observer.schedule(handler, folder, recursive=False)
+        observer.start()
+
+    try:
+        while not stop.is_set():
+            _drain(stop)
+
+            wake.wait(poll_interval)
+            if wake.is_set() and not stop.is_set():
+                wake.clear()
+                stop.wait(SETTLE_SECONDS)
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
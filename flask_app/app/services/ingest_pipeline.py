@@ -0,0 +1,291 @@
+"""
+The one ingestion pipeline every file import goes through:
+
+    read -> normalize -> dedupe -> group -> write
+
+A Pipeline names the stage callables of one kind of import (contracts,
+sellers, brands, categories). iter_batches runs the parse stages over a
+file chunk by chunk and write_batch runs the write stage, so the parse
+side can live in another process than the writer. Each stage call is
+timed into a RunStats, which the workers save as JSON next to their logs.
+"""
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from ..repositories import brand_repository, category_repository, contract_repository, seller_repository
+from ..repositories.contract_repository import CONTRACT_FIELDS, ITEM_FIELDS
+from .readers import CHUNK_ROWS, iter_frames
+
+STAGES = ("read", "normalize", "dedupe", "group", "write")
+
+
+class Pipeline:
+    """
+    Stage callables of one kind of import. Only `write` is required; a
+    missing stage passes its input through. With a `group_key`, rows
+    sharing the key are never split across batches: the trailing run of a
+    chunk is carried into the next.
+    """
+
+    def __init__(self, name, write, normalize=None, group=None, dedupe=None,
+                 required=(), group_key=None):
+        self.name = name
+        self.normalize = normalize
+        self.group = group
+        self.dedupe = dedupe
+        self.write = write
+        self.required = set(required)
+        self.group_key = group_key
+
+
+# ----------------- stats -----------------
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+
+
+def _empty_stage():
+    return {
+        "calls": 0, "seconds": 0.0, "rows_in": 0, "rows_out": 0,
+        "rss_mb": None, "rss_delta_mb": None,
+    }
+
+
+class RunStats:
+    """Wall time, rows in/out and resident memory per stage for one file."""
+
+    def __init__(self, pipeline, source):
+        self.pipeline = pipeline
+        self.source = source
+        self.started = datetime.now()
+        self.stages = {stage: _empty_stage() for stage in STAGES}
+
+    def record(self, stage, seconds, rows_in, rows_out, rss_before=None):
+        entry = self.stages[stage]
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["rows_in"] += rows_in
+        entry["rows_out"] += rows_out
+
+        rss = _rss_mb()
+        if rss is not None:
+            entry["rss_mb"] = max(entry["rss_mb"] or 0, rss)
+            if rss_before is not None:
+                entry["rss_delta_mb"] = max(entry["rss_delta_mb"] or 0, round(rss - rss_before, 1))
+
+    def timed(self, stage, func, data):
+        """Run one stage call on `data` and record it; returns its result."""
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        result = func(data)
+        self.record(stage, time.perf_counter() - start, len(data), len(result), rss_before)
+        return result
+
+    def merge(self, stages):
+        """Add stage totals recorded elsewhere, e.g. by a parser process."""
+        for stage, other in stages.items():
+            entry = self.stages[stage]
+            for field in ("calls", "seconds", "rows_in", "rows_out"):
+                entry[field] += other[field]
+            for field in ("rss_mb", "rss_delta_mb"):
+                if other[field] is not None:
+                    entry[field] = max(entry[field] or 0, other[field])
+
+    def to_dict(self, status=None):
+        return {
+            "pipeline": self.pipeline,
+            "source": self.source,
+            "status": status,
+            "started": self.started.isoformat(timespec="seconds"),
+            "seconds": round((datetime.now() - self.started).total_seconds(), 3),
+            "stages": {
+                stage: dict(entry, seconds=round(entry["seconds"], 3))
+                for stage, entry in self.stages.items()
+            },
+        }
+
+    def save(self, log_dir, status=None):
+        """Write the stats to `<log_dir>/<source>.<time>.stages.json`."""
+        os.makedirs(log_dir, exist_ok=True)
+        stamp = self.started.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(log_dir, f"{self.source}.{stamp}.stages.json")
+        with open(path, "w") as f:
+            json.dump(self.to_dict(status), f, indent=2)
+        return path
+
+
+# ----------------- running -----------------
+
+def _read_chunks(filepath, chunk_rows, skip_rows, stats):
+    frames = iter_frames(filepath, chunk_rows, skip_rows)
+    while True:
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        df = next(frames, None)
+        if df is None:
+            return
+        stats.record("read", time.perf_counter() - start, len(df), len(df), rss_before)
+        yield df
+
+
+def _run_stage(pipeline, stage, data, stats):
+    func = getattr(pipeline, stage)
+    return stats.timed(stage, func, data) if func else data
+
+
+def _group(pipeline, df, stats):
+    # Rows are de-duplicated while still a frame, before grouping
+    df = _run_stage(pipeline, "dedupe", df, stats)
+    return _run_stage(pipeline, "group", df, stats)
+
+
+def iter_batches(pipeline, filepath, stats=None, chunk_rows=CHUNK_ROWS, skip_rows=0):
+    """
+    Run read -> normalize -> dedupe -> group over a file and yield
+    (rows_done, batch) per chunk, ready for write_batch. rows_done is the
+    number of source rows whose records have all been yielded so far, i.e.
+    the point to resume from with `skip_rows`.
+
+    A group whose rows are scattered across chunks is simply yielded more
+    than once; the contract writer merges items of an existing contract, so
+    the result is the same as grouping the whole file at once.
+    """
+    stats = stats or RunStats(pipeline.name, os.path.basename(filepath))
+    key = pipeline.group_key
+    rows_read = skip_rows
+    carry = None
+
+    for df in _read_chunks(filepath, chunk_rows, skip_rows, stats):
+        missing = pipeline.required - set(df.columns)
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
+
+        if key is None:
+            rows_read += len(df)
+            yield rows_read, _group(pipeline, _run_stage(pipeline, "normalize", df, stats), stats)
+            continue
+
+        df = df.assign(_row=range(rows_read, rows_read + len(df)))
+        rows_read += len(df)
+        df = _run_stage(pipeline, "normalize", df, stats)
+
+        if carry is not None:
+            df = pd.concat([carry, df], ignore_index=True)
+
+        df = df[df[key].notna()]
+        if df.empty:
+            carry = None
+            continue
+
+        ids = df[key]
+        breaks = (ids != ids.iloc[-1]).to_numpy().nonzero()[0]
+        tail_start = breaks[-1] + 1 if len(breaks) else 0
+
+        carry = df.iloc[tail_start:]
+        if tail_start:
+            yield int(carry['_row'].iloc[0]), _group(pipeline, df.iloc[:tail_start], stats)
+
+    if carry is not None and not carry.empty:
+        yield rows_read, _group(pipeline, carry, stats)
+
+
+def write_batch(pipeline, batch, stats, **kwargs):
+    """Run the write stage on one batch; returns (written, failed)."""
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    written, failed = pipeline.write(batch, **kwargs)
+    stats.record("write", time.perf_counter() - start, len(batch), written, rss_before)
+    return written, failed
+
+
+# ----------------- contracts -----------------
+
+CONTRACTS = Pipeline(
+    "contracts",
+    normalize=contract_repository.normalize_contracts,
+    group=contract_repository.group_contracts,
+    dedupe=contract_repository.drop_duplicate_items,
+    write=contract_repository.add_contracts,
+    required=CONTRACT_FIELDS + ITEM_FIELDS,
+    group_key="contract_id",
+)
+
+
+# ----------------- sellers -----------------
+
+SELLERS = Pipeline(
+    "sellers",
+    normalize=seller_repository.normalize_sellers,
+    dedupe=seller_repository.drop_duplicate_sellers,
+    write=seller_repository.upsert_sellers,
+)
+
+
+# ----------------- master data -----------------
+
+def _fill(df, defaults):
+    df = df.copy()
+    for column, default in defaults.items():
+        df[column] = df[column].astype(object).where(df[column].notna(), default)
+    return df
+
+
+def normalize_brands(df):
+    df = _fill(df, {'code': 'Unknown', 'product_count': 0, 'brand': 'Unknown'})
+    df['product_count'] = df['product_count'].astype(int)
+    return df
+
+
+def _add_counts(counts, result):
+    inserted, updated, skipped = result
+    if counts is not None:
+        counts["inserted"] += inserted
+        counts["updated"] += updated
+        counts["skipped"] += skipped
+    return inserted + updated, 0
+
+
+def write_brands(df, update_existing=False, counts=None):
+    rows = df[['code', 'product_count', 'brand']].rename(columns={'brand': 'name'})
+    result = brand_repository.bulk_import_brands(rows.to_dict("records"), update_existing)
+    return _add_counts(counts, result)
+
+
+def write_categories(df, update_existing=False, counts=None):
+    rows = df[['value', 'text']].astype(object).where(df[['value', 'text']].notna(), None)
+    result = category_repository.bulk_import_categories(rows.to_dict("records"), update_existing)
+    return _add_counts(counts, result)
+
+
+BRANDS = Pipeline(
+    "brands",
+    normalize=normalize_brands,
+    write=write_brands,
+    required={'code', 'product_count', 'brand'},
+)
+
+CATEGORIES = Pipeline(
+    "categories",
+    write=write_categories,
+    required={'value', 'text'},
+)
+
+PIPELINES = {
+    pipeline.name: pipeline
+    for pipeline in (CONTRACTS, SELLERS, BRANDS, CATEGORIES)
+}
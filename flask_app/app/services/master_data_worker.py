@@ -0,0 +1,114 @@
+import os
+from flask import current_app
+
+from . import file_lock
+from ..extensions import db
+from ..repositories import ingest_repository
+from .ingest_pipeline import PIPELINES, RunStats, iter_batches, write_batch
+from .readers import INPUT_EXTENSIONS
+
+BASE_DIR = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__),  # app/services
+        "..",                       # app
+        "..",                       # project root
+        "master_data"
+    )
+)
+
+KINDS = ("brands", "categories")
+
+# One pending/failed pair per kind; progress rows use the kind as worker name
+PENDING = {kind: os.path.join(BASE_DIR, kind, "pending") for kind in KINDS}
+FAILED = {kind: os.path.join(BASE_DIR, kind, "failed") for kind in KINDS}
+LOGS = os.path.join(BASE_DIR, "logs")
+LOCK_FILE = os.path.join(BASE_DIR, ".lock")
+
+
+# ----------------- helpers -----------------
+
+def ensure_dirs():
+    for kind in KINDS:
+        os.makedirs(PENDING[kind], exist_ok=True)
+        os.makedirs(FAILED[kind], exist_ok=True)
+    os.makedirs(LOGS, exist_ok=True)
+
+
+def update_file_status(kind, filename, status, inserted=0, rows_parsed=None, message=None):
+    ingest_repository.update_progress(
+        kind, filename, status, inserted, rows_parsed=rows_parsed, message=message
+    )
+
+
+def is_locked():
+    return file_lock.is_held(LOCK_FILE)
+
+
+def lock():
+    return file_lock.acquire(LOCK_FILE)
+
+
+def unlock():
+    file_lock.release(LOCK_FILE)
+
+
+# ----------------- core logic -----------------
+
+def process_excel(kind, filepath):
+    filename = os.path.basename(filepath)
+    update_file_status(kind, filename, "running")
+
+    pipeline = PIPELINES[kind]
+    stats = RunStats(kind, filename)
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    update_existing = current_app.config.get("MASTER_DATA_UPDATE_EXISTING", False)
+    inserted = 0
+    rows_parsed = 0
+
+    try:
+        for rows_done, df in iter_batches(pipeline, filepath, stats):
+            written, _ = write_batch(
+                pipeline, df, stats, update_existing=update_existing, counts=counts
+            )
+            inserted += written
+            rows_parsed = rows_done
+            update_file_status(kind, filename, "running", inserted, rows_parsed)
+
+        message = "{inserted} inserted, {updated} updated, {skipped} skipped".format(**counts)
+        update_file_status(kind, filename, "completed", inserted, rows_parsed, message=message)
+        stats.save(LOGS, "completed")
+        os.remove(filepath)
+
+    except Exception as e:
+        # Progress is written on its own connection; on SQLite the failed
+        # write would still hold the database lock
+        db.session.rollback()
+        update_file_status(kind, filename, "failed", inserted, rows_parsed, message=str(e))
+        stats.save(LOGS, "failed")
+        os.replace(filepath, os.path.join(FAILED[kind], filename))
+
+
+def process_next_pending():
+    """Import every pending brand and category file, oldest name first."""
+    ensure_dirs()
+
+    if is_locked():
+        return "locked"
+
+    jobs = [
+        (kind, os.path.join(PENDING[kind], f))
+        for kind in KINDS
+        for f in sorted(os.listdir(PENDING[kind]))
+        if f.endswith(INPUT_EXTENSIONS)
+    ]
+    if not jobs:
+        return "no_pending"
+
+    if not lock():
+        return "locked"
+    try:
+        for kind, path in jobs:
+            process_excel(kind, path)
+        return "processed"
+    finally:
+        unlock()
@@ -0,0 +1,168 @@
+import re
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# Rows per DataFrame chunk handed to the ingestion workers
+CHUNK_ROWS = 5000
+
+# Bytes per block read by pyarrow's CSV reader
+CSV_BLOCK_SIZE = 16 * 1024 * 1024
+
+ARROW_EXTENSIONS = (".csv", ".csv.gz", ".parquet", ".arrow")
+INPUT_EXTENSIONS = (".xls", ".xlsx") + ARROW_EXTENSIONS
+
+
+def normalize_column(c):
+    # "Contract No." -> "contract_no"
+    c = str(c).strip().lower().replace(" ", "_")
+    return re.sub(r"[^\w]", "", c)
+
+
+def iter_excel_chunks(filepath, chunk_rows=CHUNK_ROWS, skip_rows=0):
+    """
+    Stream the first sheet of an .xlsx workbook as DataFrames of at most
+    `chunk_rows` rows using openpyxl's read-only row iterator, so only one
+    chunk is ever held in memory. The first `skip_rows` non-blank data rows
+    are read past without being materialized.
+    """
+    wb = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+
+        header = next(rows, None)
+        if header is None:
+            return
+
+        columns = [
+            normalize_column(c) if c is not None else f"unnamed_{i}"
+            for i, c in enumerate(header)
+        ]
+        width = len(columns)
+
+        buffer = []
+        for row in rows:
+            # read-only sheets report trailing blank rows as all-None
+            if all(v is None for v in row):
+                continue
+
+            if skip_rows:
+                skip_rows -= 1
+                continue
+
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            buffer.append(row[:width])
+
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame.from_records(buffer, columns=columns)
+                buffer = []
+
+        if buffer:
+            yield pd.DataFrame.from_records(buffer, columns=columns)
+    finally:
+        wb.close()
+
+
+def _import_pyarrow():
+    # Optional dependency: only needed for the non-Excel formats
+    try:
+        import pyarrow
+        import pyarrow.csv
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError(
+            "pyarrow is required to read CSV, Parquet and Arrow files (pip install pyarrow)"
+        )
+    return pyarrow
+
+
+def _arrow_batches(filepath, chunk_rows):
+    pa = _import_pyarrow()
+    name = filepath.lower()
+
+    if name.endswith(".parquet"):
+        parquet = pa.parquet.ParquetFile(filepath)
+        yield from parquet.iter_batches(batch_size=chunk_rows, use_threads=True)
+
+    elif name.endswith(".arrow"):
+        with pa.memory_map(filepath) as source:
+            try:
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    yield reader.get_batch(i)
+            except pa.ArrowInvalid:
+                # Not the IPC file format: read it as an IPC stream
+                source.seek(0)
+                yield from pa.ipc.open_stream(source)
+
+    else:
+        # .csv and .csv.gz; compression is detected from the extension.
+        # Every column is read as text: types inferred from the first block
+        # break on later values (hsn_code 8471 ... 84X1), and the
+        # repositories coerce numbers and dates themselves.
+        read_options = pa.csv.ReadOptions(use_threads=True, block_size=CSV_BLOCK_SIZE)
+        with pa.csv.open_csv(filepath, read_options=read_options) as header_reader:
+            names = header_reader.schema.names
+
+        reader = pa.csv.open_csv(
+            filepath,
+            read_options=read_options,
+            convert_options=pa.csv.ConvertOptions(
+                column_types={name: pa.string() for name in names},
+                strings_can_be_null=True,
+            ),
+        )
+        yield from reader
+
+
+def iter_arrow_chunks(filepath, chunk_rows=CHUNK_ROWS, skip_rows=0):
+    """
+    Stream a CSV (optionally gzipped), Parquet or Arrow IPC file through
+    pyarrow's multithreaded readers, re-sliced into DataFrames of at most
+    `chunk_rows` rows so the workers see the same chunks as for Excel.
+    All-null rows are dropped and not counted towards `skip_rows`.
+    """
+    buffer = None
+    for batch in _arrow_batches(filepath, chunk_rows):
+        df = batch.to_pandas()
+        df.columns = [normalize_column(c) for c in df.columns]
+        df = df.dropna(how="all")
+
+        if skip_rows:
+            skipped = min(skip_rows, len(df))
+            df = df.iloc[skipped:]
+            skip_rows -= skipped
+
+        if buffer is not None:
+            df = pd.concat([buffer, df], ignore_index=True)
+
+        while len(df) >= chunk_rows:
+            yield df.iloc[:chunk_rows].reset_index(drop=True)
+            df = df.iloc[chunk_rows:]
+        buffer = df
+
+    if buffer is not None and not buffer.empty:
+        yield buffer.reset_index(drop=True)
+
+
+def iter_frames(filepath, chunk_rows=CHUNK_ROWS, skip_rows=0):
+    """
+    Yield DataFrame chunks with normalized column names for any supported
+    input file, starting after the first `skip_rows` data rows. Legacy .xls
+    workbooks cannot be streamed by openpyxl and are read in one piece.
+    """
+    if filepath.lower().endswith(".xlsx"):
+        yield from iter_excel_chunks(filepath, chunk_rows, skip_rows)
+        return
+
+    if filepath.lower().endswith(ARROW_EXTENSIONS):
+        yield from iter_arrow_chunks(filepath, chunk_rows, skip_rows)
+        return
+
+    df = pd.read_excel(filepath)
+    df.columns = [normalize_column(c) for c in df.columns]
+    df = df.dropna(how="all").iloc[skip_rows:]
+    if not df.empty:
+        yield df
@@ -1,10 +1,10 @@
 import os
-import json
-import pandas as pd
-from datetime import datetime
-import re
 
-from ..repositories import seller_repository
+from . import file_lock
+from ..repositories import ingest_repository
+from ..repositories.keyset import clear_counts
+from .ingest_pipeline import SELLERS, RunStats, iter_batches, write_batch
+from .readers import INPUT_EXTENSIONS
 
 # BASE_DIR = os.path.abspath(
 #     os.path.join(os.path.dirname(__file__), "..", "..", "contracts_data", "sellers")
@@ -21,9 +21,10 @@ BASE_DIR = os.path.abspath(
 PENDING = os.path.join(BASE_DIR, "pending")
 FAILED = os.path.join(BASE_DIR, "failed")
 LOGS = os.path.join(BASE_DIR, "logs")
-PROGRESS_FILE = os.path.join(BASE_DIR, "progress.json")
 LOCK_FILE = os.path.join(BASE_DIR, ".lock")
 
+WORKER = "sellers"
+
 
 # ----------------- helpers -----------------
 
@@ -33,106 +34,70 @@ def ensure_dirs():
     os.makedirs(LOGS, exist_ok=True)
 
 def mark_idle():
-    progress = load_progress()
-    progress["_system"] = {
-        "status": "idle",
-        "message": "No pending seller files",
-        "updated": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    save_progress(progress)
-
-def ensure_progress_file():
-    if not os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, "w") as f:
-            json.dump({}, f)
+    ingest_repository.update_progress(
+        WORKER, "_system", "idle", message="No pending seller files"
+    )
+    ingest_repository.prune_progress(WORKER)
 
 
 def load_progress():
-    ensure_progress_file()
-    with open(PROGRESS_FILE) as f:
-        return json.load(f)
-
-
-def save_progress(data):
-    with open(PROGRESS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    return ingest_repository.load_progress(WORKER)
 
 
-def update_file_status(filename, status, inserted=0, failed=0):
-    progress = load_progress()
-
-    if filename not in progress:
-        progress[filename] = {}
-
-    progress[filename].update({
-        "status": status,
-        "inserted": inserted,
-        "failed": failed,
-        "updated": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-    })
-
-    save_progress(progress)
+def update_file_status(filename, status, inserted=0, failed=0, rows_parsed=None, message=None):
+    ingest_repository.update_progress(
+        WORKER, filename, status, inserted, failed,
+        rows_parsed=rows_parsed, message=message
+    )
 
 
 def is_locked():
-    return os.path.exists(LOCK_FILE)
+    return file_lock.is_held(LOCK_FILE)
 
 
 def lock():
-    with open(LOCK_FILE, "w") as f:
-        f.write(str(os.getpid()))
+    return file_lock.acquire(LOCK_FILE)
 
 
 def unlock():
-    if os.path.exists(LOCK_FILE):
-        os.remove(LOCK_FILE)
+    file_lock.release(LOCK_FILE)
 
 
 # ----------------- core logic -----------------
 
-def clean_column_name(c):
-    c = c.strip().lower()
-    c = c.replace(" ", "_")
-    c = re.sub(r"[^\w]", "", c)
-    return c
-
-
 def process_excel(filepath):
     filename = os.path.basename(filepath)
     update_file_status(filename, "running")
 
+    stats = RunStats(SELLERS.name, filename)
     inserted = 0
     failed = 0
+    rows_parsed = 0
 
     try:
-        df = pd.read_excel(filepath, engine="openpyxl")
-        df.columns = [clean_column_name(c) for c in df.columns]
-
-        seller_fields = [
-            "contract_no", "generated_date", "category_name",
-            "seller_id", "company_name", "contact_no",
-            "email", "address", "msme_reg_no", "gstin"
-        ]
-
-        for _, row in df.iterrows():
-            try:
-                data = {f: row.get(f) for f in seller_fields}
-                if seller_repository.add_or_update_seller(data):
-                    inserted += 1
-            except Exception:
-                failed += 1
-
-        update_file_status(filename, "completed", inserted, failed)
+        for rows_done, df in iter_batches(SELLERS, filepath, stats):
+            written, batch_failed = write_batch(SELLERS, df, stats)
+            inserted += written
+            failed += batch_failed
+            rows_parsed = rows_done
+
+            update_file_status(filename, "running", inserted, failed, rows_parsed)
+
+        update_file_status(filename, "completed", inserted, failed, rows_parsed)
+        stats.save(LOGS, "completed")
         os.remove(filepath)
 
-    except Exception:
-        update_file_status(filename, "failed", inserted, failed)
+    except Exception as e:
+        update_file_status(filename, "failed", inserted, failed, rows_parsed, message=str(e))
+        stats.save(LOGS, "failed")
         os.rename(filepath, os.path.join(FAILED, filename))
 
+    finally:
+        clear_counts()
+
 
 def process_next_pending():
     ensure_dirs()
-    ensure_progress_file()
 
     #  STOP if already running
     if is_locked():
@@ -140,7 +105,7 @@ def process_next_pending():
 
     files = [
         f for f in os.listdir(PENDING)
-        if f.endswith((".xls", ".xlsx"))
+        if f.endswith(INPUT_EXTENSIONS)
     ]
 
     #  STOP when pending is empty
@@ -149,7 +114,8 @@ def process_next_pending():
         print("NO PENDING FILES — PROCESS STOPPED")
         return "no_pending"
 
-    lock()
+    if not lock():
+        return "locked"
     try:
         process_excel(os.path.join(PENDING, files[0]))
         return "processed"
@@ -160,16 +126,16 @@ def process_next_pending():
 
 def retry_all_failed():
     ensure_dirs()
-    ensure_progress_file()
 
     if is_locked():
         return
 
-    files = sorted(f for f in os.listdir(FAILED) if f.endswith((".xls", ".xlsx")))
+    files = sorted(f for f in os.listdir(FAILED) if f.endswith(INPUT_EXTENSIONS))
     if not files:
         return
 
-    lock()
+    if not lock():
+        return
     try:
         for f in files:
             process_excel(os.path.join(FAILED, f))
@@ -0,0 +1,31 @@
+import os
+from werkzeug.utils import secure_filename
+
+from ..repositories import ingest_repository
+
+
+def spool_upload(file, folder, worker):
+    """
+    Stream an uploaded file into a worker's pending `folder` under a new job
+    id and mark it queued. The file is written under a temporary name and
+    renamed once complete, so watchers never see a partial upload.
+    Returns the job id.
+    """
+    os.makedirs(folder, exist_ok=True)
+
+    ext = os.path.splitext(file.filename)[1].lower()
+    name = secure_filename(file.filename)
+    if not name.lower().endswith(ext):
+        # secure_filename drops non-ASCII names entirely
+        name = f"upload{ext}"
+
+    job_id, filename = ingest_repository.new_job_filename(name)
+    path = os.path.join(folder, filename)
+
+    # werkzeug copies the request stream to disk in chunks
+    file.save(path + ".part")
+
+    # Queued before the rename so a worker's "running" update always wins
+    ingest_repository.update_progress(worker, filename, "queued")
+    os.replace(path + ".part", path)
+    return job_id
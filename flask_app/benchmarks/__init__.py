@@ -0,0 +1 @@
+"""Ingestion benchmarks and query-plan checks; see benchmarks/ingest.py and benchmarks/plans.py."""
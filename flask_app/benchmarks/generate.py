@@ -0,0 +1,179 @@
+"""
+Synthetic GeM-style contract and seller workbooks for the ingestion
+benchmarks.
+
+    python -m benchmarks.generate --sizes 10k 100k --out benchmarks/data
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+SIZES = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+# Header row exactly as in a GeM contract export; normalizes to the columns
+# upload_contracts_excel requires
+CONTRACT_HEADERS = [
+    "Contract ID", "Status", "Organization Type", "Ministry", "Department",
+    "Organization Name", "Office Zone", "Location", "Buyer Designation",
+    "Buying Mode", "Bid Number", "Contract Date", "Total",
+    "Service", "Category Name", "Product", "Brand", "Model",
+    "HSN Code", "Ordered Quantity", "Price",
+]
+
+SELLER_HEADERS = [
+    "Contract No.", "Generated Date", "Category Name", "Seller ID",
+    "Company Name", "Contact No", "Email", "Address", "MSME Reg No", "GSTIN",
+]
+
+STATUSES = ["Active", "Closed", "Cancelled"]
+ORG_TYPES = ["Central Government", "State Government", "PSU"]
+MINISTRIES = [
+    "Ministry of Defence", "Ministry of Railways", "Ministry of Home Affairs",
+    "Ministry of Health and Family Welfare", "Ministry of Finance",
+]
+ZONES = ["North", "South", "East", "West", "Central"]
+LOCATIONS = ["Delhi", "Mumbai", "Chennai", "Kolkata", "Bengaluru", "Lucknow"]
+BUYING_MODES = ["Direct Purchase", "L1 Purchase", "Bid", "Reverse Auction"]
+CATEGORIES = [
+    "Desktop Computers", "Laptop - Notebook", "Office Chair", "Printer",
+    "Air Conditioner", "UPS", "Steel Almirah", "Projector",
+]
+BRANDS = ["HP", "Dell", "Lenovo", "Godrej", "Voltas", "Epson", "Acer", "APC", " hp ", "Generic"]
+SERVICES = ["Installation", "Annual Maintenance", "Repair"]
+
+START_DATE = datetime(2024, 1, 1)
+
+
+def _maybe(rng, value, null_rate):
+    return None if rng.random() < null_rate else value
+
+
+def _contract_date(rng):
+    date = START_DATE + timedelta(days=rng.randint(0, 700))
+    # Exports mix real date cells with dd-mm-yyyy text
+    return date if rng.random() < 0.7 else date.strftime("%d-%m-%Y")
+
+
+def contract_rows(rows, seed=0, duplicate_rate=0.05, null_rate=0.03):
+    """
+    Yield `rows` contract rows. Each contract spans 1-6 consecutive item
+    rows; about `duplicate_rate` of contracts reuse an earlier contract id
+    (split contracts), item rows are sometimes repeated verbatim, and
+    optional cells are blank at `null_rate`.
+    """
+    rng = random.Random(seed)
+    produced = 0
+    next_id = 1
+    seen = []
+
+    while produced < rows:
+        if seen and rng.random() < duplicate_rate:
+            contract_id = rng.choice(seen)
+        else:
+            contract_id = f"GEMC-511687{next_id:08d}"
+            next_id += 1
+            seen.append(contract_id)
+
+        head = [
+            contract_id,
+            rng.choice(STATUSES),
+            rng.choice(ORG_TYPES),
+            rng.choice(MINISTRIES),
+            _maybe(rng, f"Department {rng.randint(1, 60)}", null_rate),
+            f"Organisation {rng.randint(1, 400)}",
+            rng.choice(ZONES),
+            rng.choice(LOCATIONS),
+            _maybe(rng, "Procurement Officer", null_rate),
+            rng.choice(BUYING_MODES),
+            _maybe(rng, f"GEM/2024/B/{rng.randint(1000000, 9999999)}", null_rate),
+            _contract_date(rng),
+            round(rng.uniform(1_000, 5_000_000), 2),
+        ]
+
+        item = None
+        for _ in range(min(rng.randint(1, 6), rows - produced)):
+            if item is None or rng.random() > 0.1:
+                is_service = rng.random() < 0.15
+                item = [
+                    rng.choice(SERVICES) if is_service else None,
+                    rng.choice(CATEGORIES),
+                    None if is_service else f"Product {rng.randint(1, 5000)}",
+                    _maybe(rng, rng.choice(BRANDS), null_rate),
+                    _maybe(rng, f"Model-{rng.randint(100, 999)}", null_rate),
+                    _maybe(rng, rng.choice([8471, 8443, 9403, 8415, 8504]), null_rate),
+                    rng.randint(1, 50),
+                    round(rng.uniform(100, 200_000), 2),
+                ]
+            # else: the previous item is repeated verbatim
+            yield head + item
+            produced += 1
+
+
+def seller_rows(rows, seed=0, duplicate_rate=0.05, null_rate=0.03):
+    """Yield `rows` seller rows, re-listing about `duplicate_rate` contract numbers."""
+    rng = random.Random(seed)
+    for i in range(rows):
+        number = rng.randint(1, i) if i and rng.random() < duplicate_rate else i + 1
+        generated = START_DATE + timedelta(days=rng.randint(0, 700), minutes=rng.randint(0, 1440))
+        yield [
+            f"GEMC-511687{number:08d}",
+            generated if rng.random() < 0.7 else generated.strftime("%d/%m/%Y %H:%M"),
+            _maybe(rng, rng.choice(CATEGORIES), null_rate),
+            f"SELLER-{rng.randint(1, 20000)}",
+            f"Company {rng.randint(1, 20000)} Pvt Ltd",
+            _maybe(rng, rng.randint(7000000000, 9999999999), null_rate),
+            _maybe(rng, f"sales{rng.randint(1, 20000)}@example.com", null_rate),
+            _maybe(rng, f"{rng.randint(1, 999)}, {rng.choice(LOCATIONS)}", null_rate),
+            _maybe(rng, f"UDYAM-DL-{rng.randint(10, 99)}-{rng.randint(1000000, 9999999)}", 0.4),
+            _maybe(rng, f"07AAACA{rng.randint(1000, 9999)}A1Z{rng.randint(1, 9)}", null_rate),
+        ]
+
+
+def write_workbook(path, headers, rows):
+    # write_only streams rows to disk, so 1M-row files fit in memory
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(headers)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return path
+
+
+def generate(out_dir, size, seed=0):
+    """Write contracts_<size>.xlsx and sellers_<size>.xlsx to `out_dir` unless present."""
+    os.makedirs(out_dir, exist_ok=True)
+    rows = SIZES[size]
+
+    contracts = os.path.join(out_dir, f"contracts_{size}.xlsx")
+    if not os.path.exists(contracts):
+        write_workbook(contracts, CONTRACT_HEADERS, contract_rows(rows, seed))
+
+    sellers = os.path.join(out_dir, f"sellers_{size}.xlsx")
+    if not os.path.exists(sellers):
+        write_workbook(sellers, SELLER_HEADERS, seller_rows(rows, seed))
+
+    return contracts, sellers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["10k"], choices=list(SIZES))
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "data"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        for path in generate(args.out, size, args.seed):
+            print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Ingestion throughput benchmarks against a throwaway SQLite database.
+
+    python -m benchmarks.ingest --sizes 10k 100k
+
+Every case runs in its own subprocess so peak RSS is measured per case.
+Results (rows/sec, peak RSS, DB round trips) are written as JSON to
+benchmarks/results/ so runs can be compared across releases.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from . import generate
+
+FLASK_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+CASES = ("contract_worker", "seller_worker", "add_contract")
+
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+# ----------------- measurement -----------------
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        resource = None
+
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+
+
+def _count_round_trips(engine):
+    counter = {"n": 0}
+
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(*args):
+        counter["n"] += 1
+
+    return counter
+
+
+# ----------------- cases (run in the child process) -----------------
+
+def _worker_case(worker, source, workdir):
+    path = shutil.copy(source, os.path.join(workdir, os.path.basename(source)))
+    worker.FAILED = workdir
+    worker.LOGS = workdir
+
+    def run():
+        worker.process_excel(path)
+        progress = worker.load_progress()[os.path.basename(path)]
+        return progress["rows_parsed"], progress["status"]
+
+    return run
+
+
+def _add_contract_case(source):
+    from app.repositories import contract_repository
+    from app.services.ingest_pipeline import CONTRACTS, iter_batches
+
+    # Parsing is not part of what is measured here
+    rows = 0
+    contracts = []
+    for rows, batch in iter_batches(CONTRACTS, source):
+        contracts.extend(batch)
+
+    def run():
+        for contract_data in contracts:
+            contract_repository.add_contract(contract_data)
+        return rows, "completed"
+
+    return run
+
+
+def run_case(case, source, workdir):
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "bench.db")
+    os.environ["FLASK_MIGRATE"] = "1"  # no admin bootstrap
+    sys.path.insert(0, FLASK_APP_ROOT)
+
+    from app import create_app
+    from app.extensions import db
+    from app.services import contract_excel_worker, seller_excel_worker
+
+    app = create_app("config.ProdConfig")
+    with app.app_context():
+        if case == "contract_worker":
+            run = _worker_case(contract_excel_worker, source, workdir)
+        elif case == "seller_worker":
+            run = _worker_case(seller_excel_worker, source, workdir)
+        else:
+            run = _add_contract_case(source)
+
+        counter = _count_round_trips(db.engine)
+        start = time.perf_counter()
+        rows, status = run()
+        seconds = time.perf_counter() - start
+
+    return {
+        "case": case,
+        "source": os.path.basename(source),
+        "status": status,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "round_trips": counter["n"],
+    }
+
+
+# ----------------- driver -----------------
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=FLASK_APP_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _spawn(case, source):
+    with tempfile.TemporaryDirectory() as workdir:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.ingest", "--child", case, source, workdir],
+            cwd=FLASK_APP_ROOT, capture_output=True, text=True,
+        )
+
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+
+    return {
+        "case": case,
+        "source": os.path.basename(source),
+        "status": "error",
+        "error": (proc.stderr.strip().splitlines() or ["no output"])[-1],
+    }
+
+
+def run_suite(sizes, cases=CASES, data_dir=DATA_DIR, seed=0):
+    results = []
+    for size in sizes:
+        contracts, sellers = generate.generate(data_dir, size, seed)
+        for case in cases:
+            source = sellers if case == "seller_worker" else contracts
+            result = _spawn(case, source)
+            result["size"] = size
+            results.append(result)
+            print(
+                f"{size:>5} {case:<16} {result.get('rows_per_sec', '-'):>10} rows/s "
+                f"{result.get('peak_rss_mb', '-'):>8} MB {result.get('round_trips', '-'):>9} round trips "
+                f"[{result['status']}]"
+            )
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["10k"], choices=list(generate.SIZES))
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=CASES)
+    parser.add_argument("--data", default=DATA_DIR, help="Where generated workbooks are kept.")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/ingest-<time>.json).")
+    parser.add_argument("--child", nargs=3, metavar=("CASE", "SOURCE", "WORKDIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(RESULT_PREFIX + json.dumps(run_case(*args.child)))
+        return
+
+    report = run_suite(args.sizes, args.cases, args.data)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"ingest-{stamp}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Query-plan regression check: EXPLAIN every query the app issues against a
+seeded database and fail on full scans of large tables.
+
+    python -m benchmarks.plans --size 10k
+
+A throwaway SQLite database is seeded through the ingestion pipeline from
+the generated benchmark workbooks. Then every scenario below (user and
+admin pages, analytics APIs, an ingest batch) is run through the Flask
+test client. Each SELECT it issues is captured and re-run under
+EXPLAIN QUERY PLAN (or EXPLAIN on Postgres with --database-url). A scan of
+a large table that is not backed by an index, or an index walk without a
+LIMIT, is a failure unless the scenario allows it. The index advisor then
+suggests an index from the scanned table's WHERE / ORDER BY / GROUP BY
+columns. Exits non-zero when anything fails.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+from . import generate
+
+FLASK_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+LARGE_TABLES = {
+    "contracts", "contract_items", "sellers", "user_history", "brands", "brand_aliases",
+    "contract_month_rollups",
+}
+
+HISTORY_USERS = 200
+HISTORY_PER_USER = 25
+
+
+class Scenario:
+    """One request (or callable) whose queries are checked."""
+
+    def __init__(self, name, url=None, method="GET", json=None, admin=False, call=None,
+                 allow=None):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.json = json
+        self.admin = admin
+        self.call = call
+        # {table: reason} of scans that are inherent to the page; a
+        # "<table> count" key allows only the scans of COUNT statements
+        self.allow = allow or {}
+
+    def allows(self, table, statement):
+        if table in self.allow:
+            return True
+        is_count = re.match(r"\s*SELECT count\(", statement, re.IGNORECASE) is not None
+        return is_count and f"{table} count" in self.allow
+
+
+def _ingest_batch(workdir):
+    """A fresh contract and seller file through the pipeline, to check the write-path lookups."""
+    from app.services.ingest_pipeline import CONTRACTS, SELLERS, RunStats, iter_batches, write_batch
+
+    contracts = generate.write_workbook(
+        os.path.join(workdir, "extra_contracts.xlsx"), generate.CONTRACT_HEADERS,
+        generate.contract_rows(300, seed=1),
+    )
+    sellers = generate.write_workbook(
+        os.path.join(workdir, "extra_sellers.xlsx"), generate.SELLER_HEADERS,
+        generate.seller_rows(300, seed=1),
+    )
+    for pipeline, path in ((CONTRACTS, contracts), (SELLERS, sellers)):
+        stats = RunStats(pipeline.name, os.path.basename(path))
+        for _, batch in iter_batches(pipeline, path, stats):
+            write_batch(pipeline, batch, stats)
+
+
+SCENARIOS = [
+    # ---- user pages ----
+    Scenario("user contracts", "/user/contracts"),
+    Scenario("user contracts filtered", "/user/contracts?ministry=Railways&status=Active&page=3"),
+    Scenario("user contracts by number", "/user/api/contracts/by-contract-nos", method="POST",
+             json={"contract_nos": ["GEMC-51168700000001", "GEMC-51168700000002"]}),
+    Scenario("user contract detail", "/user/contract/api/GEMC-51168700000001"),
+    Scenario("user sellers", "/user/sellers"),
+    Scenario("user sellers filtered", "/user/sellers?company_name=Traders"),
+    Scenario("user profile", "/user/profile"),
+    Scenario("user brand list", "/user/api/brands/select2?q=hp",
+             allow={"brands": "lists every brand for the picker"}),
+    Scenario("brand compare", "/user/api/analytics/brand-compare?brand1=HP&brand2=Dell&month=2024-06"),
+
+    # ---- analytics ----
+    Scenario("analytics by status", "/user/api/analytics/contracts_by_status"),
+    Scenario("analytics by status filtered",
+             "/user/api/analytics/contracts_by_status?status=Active&date_from=2024-03-01&date_to=2024-04-01"),
+    Scenario("analytics value over time",
+             "/user/api/analytics/value_over_time?buying_mode=Bid&date_from=2024-03-01&date_to=2024-06-01"),
+    Scenario("analytics top ministries",
+             "/user/api/analytics/top_ministries?date_from=2024-03-01&date_to=2024-04-01&brands[]=HP"),
+    Scenario("analytics avg by buying mode",
+             "/user/api/analytics/avg_by_buying_mode?status=Closed&date_from=2024-01-01&date_to=2024-02-01"),
+    Scenario("analytics raw fallback",
+             "/user/api/analytics/value_over_time?min_total=100000&date_from=2024-03-01&date_to=2024-05-01"),
+    Scenario("analytics count by month",
+             "/user/api/analytics/count_by_month?date_from=2024-03-01&date_to=2024-09-01&categories[]=Printer"),
+
+    # ---- admin pages ----
+    Scenario("admin contracts", "/admin/contracts", admin=True,
+             allow={"contracts count": "list total, cached for LIST_COUNT_TTL"}),
+    Scenario("admin contracts filtered", "/admin/contracts?status=Active&ministry=Defence", admin=True),
+    Scenario("admin sellers", "/admin/sellers/manage", admin=True,
+             allow={"sellers count": "list total, cached for LIST_COUNT_TTL"}),
+    Scenario("admin sellers filtered", "/admin/sellers/manage?gstin=07AB", admin=True),
+    Scenario("admin brand search", "/admin/search/brands?term=hp", admin=True,
+             allow={"contract_items": "distinct raw spellings over all items"}),
+    Scenario("admin category search", "/admin/search/categories?term=print", admin=True,
+             allow={"sellers": "distinct categories over all sellers"}),
+
+    # ---- ingestion ----
+    Scenario("ingest batch", call=_ingest_batch),
+]
+
+
+# ----------------- seeding -----------------
+
+def seed(size):
+    from app.extensions import db
+    from app.models.user import User, UserHistory
+    from app.services.ingest_pipeline import CONTRACTS, SELLERS, RunStats, iter_batches, write_batch
+
+    contracts, sellers = generate.generate(DATA_DIR, size)
+    for pipeline, path in ((CONTRACTS, contracts), (SELLERS, sellers)):
+        stats = RunStats(pipeline.name, os.path.basename(path))
+        for _, batch in iter_batches(pipeline, path, stats):
+            write_batch(pipeline, batch, stats)
+
+    admin = User(username="admin", email="admin@example.com", is_admin=True, is_verified=True)
+    user = User(
+        username="subscriber", email="subscriber@example.com", is_verified=True,
+        brand_names="HP,Dell", category_names="Printer,UPS",
+        assigned_date_range_start=date(2024, 1, 1),
+        assigned_date_range_end=date(2025, 12, 31),
+        subscription_date=date.today() + timedelta(days=365),
+    )
+    db.session.add_all([admin, user])
+    db.session.commit()
+
+    start = datetime(2024, 1, 1)
+    db.session.execute(UserHistory.__table__.insert(), [
+        {
+            "user_id": user.id if n == 0 else user.id + 1000 + n,
+            "data_snapshot": "{}",
+            "changed_at": start + timedelta(hours=n * HISTORY_PER_USER + k),
+        }
+        for n in range(HISTORY_USERS) for k in range(HISTORY_PER_USER)
+    ])
+    db.session.commit()
+    # No ANALYZE: without statistics SQLite plans every table as if it were
+    # large, so a missing index shows up at any seed size.
+    return admin.id, user.id
+
+
+# ----------------- capture and explain -----------------
+
+def _capture(engine, sink):
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            sink.append((statement, parameters))
+
+    return capture
+
+
+def explain(conn, statement, parameters):
+    """Plan lines of one captured statement."""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[-1] for row in rows]
+    rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+    return [row[0] for row in rows]
+
+
+def full_scans(plan, statement, dialect):
+    """Large tables a plan reads in full: [(table, plan line)]."""
+    scans = []
+    limited = re.search(r"\bLIMIT\b", statement, re.IGNORECASE) is not None
+    for line in plan:
+        if dialect == "sqlite":
+            match = re.match(r"\s*SCAN (\w+)(?: AS \w+)?(.*)", line)
+            if not match or match.group(1) not in LARGE_TABLES:
+                continue
+            indexed = "INDEX" in match.group(2)
+            if indexed and limited:
+                continue  # ordered index walk that stops at the page size
+            scans.append((match.group(1), line.strip()))
+        else:
+            match = re.search(r"Seq Scan on (\w+)", line)
+            if match and match.group(1) in LARGE_TABLES:
+                scans.append((match.group(1), line.strip()))
+    return scans
+
+
+CLAUSE = re.compile(r"\b(WHERE|ORDER BY|GROUP BY)\b(.*?)(?=\bWHERE\b|\bORDER BY\b|\bGROUP BY\b|\bLIMIT\b|\)|$)",
+                    re.IGNORECASE | re.DOTALL)
+
+
+def advise(table, statement):
+    """
+    One CREATE INDEX for `table` from the columns a statement filters on,
+    then groups by, then sorts by (the primary key is always implied).
+    """
+    columns = []
+    clauses = sorted(CLAUSE.findall(statement),
+                     key=lambda c: ("WHERE", "GROUP BY", "ORDER BY").index(c[0].upper()))
+    for _, clause in clauses:
+        # the clause may stop at lower()'s closing parenthesis
+        for expression in re.findall(rf"(lower\({table}\.\w+|\b{table}\.\w+)", clause):
+            column = expression.replace(f"{table}.", "")
+            if column.startswith("lower("):
+                column += ")"
+            if column != "id" and column not in columns:
+                columns.append(column)
+    if not columns:
+        return []
+
+    name = "_".join(re.sub(r"\W+", "_", c).strip("_") for c in columns)
+    return [f"CREATE INDEX ix_{table}_{name} ON {table} ({', '.join(columns)})"]
+
+
+# ----------------- driver -----------------
+
+def run(size="10k", database_url=None):
+    workdir = tempfile.mkdtemp(prefix="plans-")
+    os.environ["DATABASE_URL"] = database_url or "sqlite:///" + os.path.join(workdir, "plans.db")
+    os.environ["FLASK_MIGRATE"] = "1"  # no admin bootstrap
+    sys.path.insert(0, FLASK_APP_ROOT)
+
+    from app import create_app
+    from app.extensions import db
+    from app.services import contract_excel_worker, seller_excel_worker
+
+    for worker in (contract_excel_worker, seller_excel_worker):
+        worker.LOGS = workdir
+
+    app = create_app("config.ProdConfig")
+    app.config["WTF_CSRF_ENABLED"] = False
+
+    with app.app_context():
+        admin_id, user_id = seed(size)
+        engine = db.engine
+
+    # Requests run outside the seeding app context: Flask-Login caches the
+    # user on `g`, which would otherwise be shared by every request.
+    results = []
+    client = app.test_client()
+    captured = []
+    listener = _capture(engine, captured)
+
+    for scenario in SCENARIOS:
+        captured.clear()
+        if scenario.call:
+            with app.app_context():
+                scenario.call(workdir)
+        else:
+            with client.session_transaction() as session:
+                session["_user_id"] = str(admin_id if scenario.admin else user_id)
+                session["_fresh"] = True
+            response = client.open(scenario.url, method=scenario.method, json=scenario.json)
+            if response.status_code >= 400:
+                results.append({"scenario": scenario.name, "error": f"HTTP {response.status_code}"})
+                continue
+
+        statements = list({(s, repr(p)): (s, p) for s, p in captured}.values())
+
+        failures = []
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                plan = explain(conn, statement, parameters)
+                for table, line in full_scans(plan, statement, conn.dialect.name):
+                    if scenario.allows(table, statement):
+                        continue
+                    failures.append({
+                        "table": table,
+                        "plan": line,
+                        "statement": " ".join(statement.split()),
+                        "advice": advise(table, statement),
+                    })
+        results.append({
+            "scenario": scenario.name,
+            "queries": len(statements),
+            "failures": failures,
+            "allowed": scenario.allow,
+        })
+
+    from sqlalchemy import event
+    event.remove(engine, "before_cursor_execute", listener)
+    return results
+
+
+def report(results):
+    advice = []
+    failed = False
+    for result in results:
+        if "error" in result:
+            failed = True
+            print(f"ERROR {result['scenario']}: {result['error']}")
+            continue
+        status = "FAIL" if result["failures"] else "ok"
+        print(f"{status:<5} {result['scenario']:<32} {result['queries']:>3} queries")
+        for failure in result["failures"]:
+            failed = True
+            print(f"        {failure['plan']}")
+            print(f"        {failure['statement'][:160]}")
+            advice.extend(a for a in failure["advice"] if a not in advice)
+
+    if advice:
+        print("\nSuggested indexes:")
+        for suggestion in advice:
+            print(f"  {suggestion};")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="10k", choices=list(generate.SIZES))
+    parser.add_argument("--database-url", help="Empty database to seed instead of a temporary SQLite file.")
+    parser.add_argument("--output", help="Also write the results as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.size, args.database_url)
+    failed = report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "size": args.size,
+                "results": results,
+            }, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,15 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_ENABLED = True
 
+    # Contracts written per commit by the Excel ingestion paths
+    INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", 500))
+    # Parser processes for multi-file ingestion (0 = one per CPU)
+    INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", 0))
+    # Brand/category imports overwrite existing codes instead of skipping them
+    MASTER_DATA_UPDATE_EXISTING = os.environ.get("MASTER_DATA_UPDATE_EXISTING", "0") == "1"
+    # Seconds the admin contract/seller list totals are cached between pages
+    LIST_COUNT_TTL = int(os.environ.get("LIST_COUNT_TTL", 60))
+
     # Flask-Login
     REMEMBER_COOKIE_DURATION = 60 * 60 * 24 * 14  # 14 days
 
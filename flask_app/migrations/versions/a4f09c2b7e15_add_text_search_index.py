@@ -0,0 +1,82 @@
+"""Add substring search index for contract and seller text filters
+
+Revision ID: a4f09c2b7e15
+Revises: e8b3d6f14a90
+Create Date: 2026-10-18 20:27:51.903342
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4f09c2b7e15'
+down_revision = 'e8b3d6f14a90'
+branch_labels = None
+depends_on = None
+
+# Same columns as app/repositories/search.py
+SEARCH_COLUMNS = {
+    'contracts': (
+        'ministry', 'department', 'organization_name',
+        'location', 'buyer_designation', 'bid_number',
+    ),
+    'sellers': ('company_name', 'gstin', 'email'),
+}
+
+
+def _sqlite_upgrade(table, columns):
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    op.execute(
+        f"CREATE VIRTUAL TABLE {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', tokenize='trigram')"
+    )
+    op.execute(
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END"
+    )
+    op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _sqlite_downgrade(table):
+    fts = f"{table}_fts"
+    for suffix in ('ai', 'ad', 'au'):
+        op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+    op.execute(f"DROP TABLE IF EXISTS {fts}")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for table, columns in SEARCH_COLUMNS.items():
+            _sqlite_upgrade(table, columns)
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                op.create_index(
+                    f'ix_{table}_{column}_trgm', table, [column],
+                    postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for table in SEARCH_COLUMNS:
+            _sqlite_downgrade(table)
+    elif dialect == 'postgresql':
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)